@@ -0,0 +1,201 @@
+"""Run the full research graph offline over a max_analysts x max_num_turns matrix.
+
+The chat model and the Tavily/Wikipedia backends are replaced by the
+deterministic fakes in `fakes.py`, with configurable latency and response
+sizes. For every cell it reports wall time, per-node latency (collected by
+`dr_agent.telemetry.NodeTelemetry`), LLM call count, tokens in/out, estimated
+cost and peak traced memory, as JSON. ``--prefix-cache`` makes the fake model
+report provider prompt-cache hits, to measure cached-token ratios per node.
+``--think-time`` pauses at the confirm_analysts interrupt like a human
+reviewer, and ``resume_s`` is the time from confirming to the final report;
+``--prewarm`` turns on speculative first turns during that pause.
+``--synthesis pipelined`` drafts each section into the report as its
+interview finishes; ``--signoff-rate`` makes interview lengths uneven and
+``--output-ratio`` makes the report body's length grow with the sections it
+is written from.
+
+    python benchmarks/bench_graph.py [--analysts 1 3 5] [--turns 1 2 3] [--async]
+        [--llm-latency 0.05] [--search-latency 0.1] [--prefix-cache]
+        [--think-time 0] [--prewarm] [--synthesis batch|pipelined]
+        [--signoff-rate 0] [--output-ratio 0] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import time
+import tracemalloc
+import uuid
+from typing import Optional
+
+from langgraph.types import Command
+
+from dr_agent.configuration import Configuration
+from dr_agent.graph import create_research_graph
+from dr_agent.prewarm import get_prewarmer
+from dr_agent.telemetry import NodeTelemetry
+from fakes import FakeChatModel, FakeSearch, use_fakes
+
+TOPIC = "The benefits of adopting LangGraph as an agent framework"
+# Prompts whose answer rewrites their input: the batch report writer and the pipelined section drafts
+REWRITE_PROMPTS = ("Write a report based upon these memos", "Draft this memo's part of the report")
+
+
+def _config(telemetry: NodeTelemetry, overrides: dict) -> dict:
+    # Caches off so every cell does the same work regardless of run order
+    configurable = {
+        "thread_id": str(uuid.uuid4()),
+        "search_cache_enabled": False,
+        "llm_cache_enabled": False,
+        "section_store_enabled": False,
+    }
+    return {"configurable": {**configurable, **overrides}, "callbacks": [telemetry]}
+
+
+def _run_sync(graph, input: dict, config: dict, think_time: float) -> tuple[dict, float]:
+    graph.invoke(input, config)
+    time.sleep(think_time)  # the reviewer reading the proposed analysts
+    start = time.perf_counter()
+    result = graph.invoke(Command(resume={"human_analyst_feedback": None}), config)
+    return result, time.perf_counter() - start
+
+
+async def _run_async(graph, input: dict, config: dict, think_time: float) -> tuple[dict, float]:
+    await graph.ainvoke(input, config)
+    await asyncio.sleep(think_time)
+    start = time.perf_counter()
+    result = await graph.ainvoke(Command(resume={"human_analyst_feedback": None}), config)
+    return result, time.perf_counter() - start
+
+
+def run_cell(
+    max_analysts: int,
+    max_num_turns: int,
+    llm: FakeChatModel,
+    search: FakeSearch,
+    async_mode: bool,
+    overrides: Optional[dict] = None,
+    think_time: float = 0.0,
+    models: Optional[dict[str, FakeChatModel]] = None,
+) -> dict:
+    """One end-to-end run, confirming the generated analysts after ``think_time``.
+
+    ``overrides`` are Configuration fields; ``models`` are per-model fakes (see `use_fakes`).
+    """
+    for fake in [llm, *(models or {}).values()]:
+        fake.list_items = {"analysts": max_analysts}
+    graph = create_research_graph(async_mode=async_mode)
+    telemetry = NodeTelemetry()
+    config = _config(telemetry, overrides or {})
+    input = {"topic": TOPIC, "max_analysts": max_analysts, "max_num_turns": max_num_turns}
+    prewarmer = get_prewarmer(Configuration.from_runnable_config(config))
+    prewarm_before = prewarmer.stats() if prewarmer is not None else {}
+
+    with use_fakes(llm, search, models):
+        tracemalloc.start()
+        start = time.perf_counter()
+        if async_mode:
+            result, resume = asyncio.run(_run_async(graph, input, config, think_time))
+        else:
+            result, resume = _run_sync(graph, input, config, think_time)
+        wall = time.perf_counter() - start - think_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    nodes = telemetry.summary()
+    return {
+        "max_analysts": max_analysts,
+        "max_num_turns": max_num_turns,
+        "async": async_mode,
+        "wall_s": round(wall, 4),
+        "resume_s": round(resume, 4),
+        "llm_calls": int(sum(node["llm_calls"] for node in nodes.values())),
+        "tokens_in": int(sum(node["prompt_tokens"] for node in nodes.values())),
+        "tokens_out": int(sum(node["completion_tokens"] for node in nodes.values())),
+        "tokens_cached": int(sum(node["cached_tokens"] for node in nodes.values())),
+        "cost_usd": round(sum(node["cost_usd"] for node in nodes.values()), 6),
+        "peak_memory_mb": round(peak / 2**20, 2),
+        "report_chars": len(result.get("final_report", "")),
+        # Speculative first turns run outside the graph, so their model calls are not in llm_calls
+        "prewarm": {key: value - prewarm_before.get(key, 0) for key, value in prewarmer.stats().items()} if prewarmer else {},
+        "nodes": {
+            name: {
+                "calls": int(node["calls"]),
+                "total_s": round(node["total_s"], 4),
+                "mean_s": round(node["mean_s"], 4),
+                "max_s": round(node["max_s"], 4),
+                "queue_wait_s": round(node["queue_wait_s"], 4),
+                "llm_calls": int(node["llm_calls"]),
+                "tokens_in": int(node["prompt_tokens"]),
+                "tokens_out": int(node["completion_tokens"]),
+                "cost_usd": round(node["cost_usd"], 6),
+                "cache_ratio": round(node["cache_ratio"], 3),
+            }
+            for name, node in nodes.items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analysts", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--async", dest="async_mode", action="store_true", help="Use the async graph")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per model call")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Extra seconds per output token")
+    parser.add_argument("--response-tokens", type=int, default=200, help="Tokens per free-text model response")
+    parser.add_argument(
+        "--output-ratio", type=float, default=0.0, help="Report body output tokens per token of the sections it is written from"
+    )
+    parser.add_argument(
+        "--signoff-rate", type=float, default=0.0, help="Share of questions ending the interview early (uneven interviews)"
+    )
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Seconds per search call")
+    parser.add_argument("--search-results", type=int, default=3, help="Documents per search call")
+    parser.add_argument("--doc-tokens", type=int, default=500, help="Tokens per search document")
+    parser.add_argument("--prefix-cache", action="store_true", help="Simulate a provider prompt prefix cache")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds spent reviewing the analysts at the interrupt")
+    parser.add_argument(
+        "--prewarm", action="store_true", help="Speculative first turns during the think time (turns on the search cache)"
+    )
+    parser.add_argument("--synthesis", choices=["batch", "pipelined"], help="synthesis_mode (default: batch)")
+    parser.add_argument("--queries", type=int, help="search_queries_per_turn (default: the Configuration default)")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    llm = FakeChatModel(
+        latency=args.llm_latency,
+        token_latency=args.token_latency,
+        response_tokens=args.response_tokens,
+        output_ratios={prompt: args.output_ratio for prompt in REWRITE_PROMPTS},
+        signoff_rate=args.signoff_rate,
+        prefix_cache=args.prefix_cache,
+    )
+    search = FakeSearch(latency=args.search_latency, results=args.search_results, doc_tokens=args.doc_tokens)
+    overrides = {} if args.queries is None else {"search_queries_per_turn": args.queries}
+    if args.prewarm:
+        # Speculative retrieval is handed over through the search cache
+        overrides.update(speculative_prewarm=True, search_cache_enabled=True)
+    if args.synthesis is not None:
+        overrides["synthesis_mode"] = args.synthesis
+    results = {
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "python": platform.python_version(),
+        "runs": [
+            run_cell(analysts, turns, llm, search, args.async_mode, overrides, args.think_time)
+            for analysts in args.analysts
+            for turns in args.turns
+        ],
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
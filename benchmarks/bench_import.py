@@ -0,0 +1,66 @@
+"""Measure the cold-start cost of importing the agent and compiling its graph.
+
+Each statement runs in a fresh interpreter, with the model and search API
+keys removed from the environment, and reports its median wall time and
+which provider packages it loaded. Exits non-zero when ``import dr_agent``
+exceeds ``--budget`` seconds, or when importing the graph loads a provider
+package (they are imported when the first client is built).
+
+    python benchmarks/bench_import.py [--repeat 5] [--budget 0.2]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    "package": "import dr_agent",
+    "graph_module": "import dr_agent.graph",
+    "compiled_graph": "from dr_agent.graph import research_graph",
+}
+PROVIDERS = ("langchain_openai", "openai", "langchain_community", "langchain_tavily", "dotenv")
+API_KEYS = ("OPENAI_API_KEY", "TAVILY_API_KEY")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+exec(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "providers": [m for m in %r if m in sys.modules]}))
+""" % (PROVIDERS,)
+
+
+def measure(statement: str, repeat: int) -> dict:
+    env = {key: value for key, value in os.environ.items() if key not in API_KEYS}
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD, statement], env=env, capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {
+        "statement": statement,
+        "median_s": round(statistics.median(run["seconds"] for run in runs), 4),
+        "max_s": round(max(run["seconds"] for run in runs), 4),
+        "providers_loaded": runs[-1]["providers"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.2, help="Seconds allowed for `import dr_agent`")
+    args = parser.parse_args()
+
+    results = {name: measure(statement, args.repeat) for name, statement in STATEMENTS.items()}
+    failures = []
+    if results["package"]["median_s"] > args.budget:
+        failures.append(f"import dr_agent took {results['package']['median_s']}s (budget {args.budget}s)")
+    for name in ("package", "graph_module", "compiled_graph"):
+        if results[name]["providers_loaded"]:
+            failures.append(f"{STATEMENTS[name]!r} loaded {', '.join(results[name]['providers_loaded'])}")
+    print(json.dumps({"budget_s": args.budget, "results": results, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,73 @@
+"""Compare BM25 chunk selection against stuffing every retrieved document.
+
+Runs offline on synthetic documents: a few Wikipedia-sized pages and Tavily
+snippets of filler text, with one planted passage that answers the question.
+Reports prompt tokens, selection time and whether the planted passage
+survived selection.
+
+    python benchmarks/bench_rerank.py [--docs 5] [--repeat 50]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from dr_agent.documents import Document, count_tokens, render_documents
+from dr_agent.retrieval import select_chunks
+
+QUESTION = "How did the rotation policy change minutes for rookie centers in the 2008 season?"
+NEEDLE = (
+    "In the 2008 season the rotation policy capped rookie centers at twenty minutes, "
+    "a change the coaching staff credited for fewer injuries."
+)
+VOCABULARY = (
+    "league team player coach season game arena contract draft market fans broadcast "
+    "training schedule travel sponsor history championship conference statistics record"
+).split()
+
+
+def make_corpus(num_docs: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+
+    def paragraph(words: int) -> str:
+        return " ".join(rng.choice(VOCABULARY) for _ in range(words)) + "."
+
+    documents = []
+    for i in range(num_docs):
+        # Alternate Wikipedia-sized pages (~4000 chars) and short web snippets
+        paragraphs = [paragraph(60) for _ in range(10 if i % 2 == 0 else 2)]
+        if i == num_docs // 2:
+            paragraphs.insert(len(paragraphs) // 2, NEEDLE)
+        retriever = "wikipedia" if i % 2 == 0 else "web"
+        documents.append(Document(f"https://example.org/{i}", "\n\n".join(paragraphs), retriever))
+    return documents
+
+
+def run(num_docs: int, repeat: int) -> dict:
+    documents = make_corpus(num_docs)
+    full_prompt = render_documents(documents)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        chunks = select_chunks(documents, QUESTION)
+    elapsed = (time.perf_counter() - start) / repeat
+    selected_prompt = render_documents(chunks)
+
+    return {
+        "documents": num_docs,
+        "full_stuffing_tokens": count_tokens(full_prompt),
+        "reranked_tokens": count_tokens(selected_prompt),
+        "token_reduction": 1 - count_tokens(selected_prompt) / count_tokens(full_prompt),
+        "selected_chunks": len(chunks),
+        "selection_ms": elapsed * 1000,
+        "needle_kept": NEEDLE in selected_prompt,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps([run(n, args.repeat) for n in args.docs], indent=2))
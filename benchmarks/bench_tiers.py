@@ -0,0 +1,110 @@
+"""Compare model tiering settings on the full research graph, offline.
+
+Each tier setting runs the graph end to end with `bench_graph.run_cell`.
+Every model is a fake chat model with its own speed, scaled by ``--scale``:
+- "single" runs every node on `Configuration.model`;
+- "tiered" uses the default `node_models` (fast model for questions and
+  search queries, strong model for sections and the report);
+- "strong" runs every model-calling node on the strong model.
+
+The strong tier is set to ``--strong-model`` (default openai/gpt-4.1); the
+graph itself leaves `strong_model` unset, which runs that tier on `model`.
+
+Response lengths are the same for every model, so tokens only move between
+models; wall time and cost change with the models' speed and prices.
+Reports, per setting, wall time, calls, tokens and estimated cost, in total
+and per model.
+
+    python benchmarks/bench_tiers.py [--analysts 3] [--turns 2] [--async] [--scale 0.25] [--strong-model openai/gpt-4.1]
+"""
+
+import argparse
+import json
+import platform
+from collections import defaultdict
+
+from dr_agent.configuration import DEFAULT_NODE_MODELS, Configuration
+from bench_graph import run_cell
+from fakes import FakeChatModel, FakeSearch
+
+# Seconds to first token and per output token, roughly as served by the provider
+MODEL_SPEEDS = {
+    "gpt-4.1-nano": (0.3, 0.004),
+    "gpt-4o-mini": (0.4, 0.010),
+    "gpt-4.1": (0.6, 0.014),
+}
+
+LLM_NODES = (
+    "create_analysts",
+    "ask_question",
+    "generate_search_query",
+    "answer_question",
+    "write_section",
+    "draft_section",
+    "digest_sections",
+    "write_report",
+    "write_introduction",
+    "write_conclusion",
+)
+
+TIERS = {
+    "single": {},
+    "tiered": DEFAULT_NODE_MODELS,
+    "strong": dict.fromkeys(LLM_NODES, "strong"),
+}
+
+
+def fake_models(scale: float, response_tokens: int) -> dict[str, FakeChatModel]:
+    return {
+        name: FakeChatModel(
+            model_name=name, latency=latency * scale, token_latency=token_latency * scale, response_tokens=response_tokens
+        )
+        for name, (latency, token_latency) in MODEL_SPEEDS.items()
+    }
+
+
+def by_model(run: dict, configuration: Configuration) -> dict:
+    """ Per-model totals of the nodes that called a model """
+    totals = defaultdict(lambda: {"llm_calls": 0, "tokens_in": 0, "tokens_out": 0, "node_s": 0.0, "cost_usd": 0.0})
+    for name, node in run["nodes"].items():
+        if node["llm_calls"]:
+            model = totals[configuration.model_for(name)]
+            model["llm_calls"] += node["llm_calls"]
+            model["tokens_in"] += node["tokens_in"]
+            model["tokens_out"] += node["tokens_out"]
+            model["node_s"] = round(model["node_s"] + node["total_s"], 4)
+            model["cost_usd"] = round(model["cost_usd"] + node["cost_usd"], 6)
+    return dict(totals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analysts", type=int, default=3)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--async", dest="async_mode", action="store_true", help="Use the async graph")
+    parser.add_argument("--scale", type=float, default=0.25, help="Multiplier on every model's latency")
+    parser.add_argument("--response-tokens", type=int, default=200, help="Tokens per free-text model response")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Seconds per search call")
+    parser.add_argument("--strong-model", default="openai/gpt-4.1", help="Model of the strong tier")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    models = fake_models(args.scale, args.response_tokens)
+    search = FakeSearch(latency=args.search_latency)
+    results = {"settings": {key: value for key, value in vars(args).items() if key != "output"}, "python": platform.python_version()}
+    for tier, node_models in TIERS.items():
+        overrides = {"node_models": dict(node_models), "strong_model": args.strong_model}
+        configuration = Configuration(**overrides)
+        default = models[configuration.model.rpartition("/")[2]]
+        run = run_cell(args.analysts, args.turns, default, search, args.async_mode, overrides, models=models)
+        results[tier] = {
+            key: run[key] for key in ("wall_s", "resume_s", "llm_calls", "tokens_in", "tokens_out", "cost_usd", "report_chars")
+        }
+        results[tier]["by_model"] = by_model(run, configuration)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
@@ -0,0 +1,231 @@
+"""Deterministic stand-ins for the chat model and search backends.
+
+Responses are derived from a hash of the prompt, so repeated runs produce the
+same text, token counts and graph paths. Latency and response sizes are
+configurable to model different providers without touching the network, and
+the chat model can simulate a provider-side prompt prefix cache.
+"""
+
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import typing
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, PrivateAttr
+
+from dr_agent.documents import count_tokens
+
+VOCABULARY = (
+    "model agent graph research report analyst source evidence latency memory "
+    "retrieval context answer question section summary policy system data result"
+).split()
+
+
+def _rng(*parts: Any) -> random.Random:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, "big"))
+
+
+def filler_text(rng: random.Random, tokens: int) -> str:
+    """ About ``tokens`` tokens (by `count_tokens`) of paragraphs of vocabulary words """
+    words, chars = [], 0
+    while chars < tokens * 4:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        chars += len(word) + 1
+    paragraphs = [" ".join(words[i:i + 60]) + "." for i in range(0, len(words), 60)]
+    return "\n\n".join(paragraphs)
+
+
+def _fake_value(annotation: Any, rng: random.Random, list_items: Callable[[str], int], name: str) -> Any:
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+        origin = typing.get_origin(annotation)
+    if origin is list:
+        (item,) = typing.get_args(annotation) or (str,)
+        return [_fake_value(item, rng, list_items, name) for _ in range(list_items(name))]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fake_instance(annotation, rng, list_items)
+    if annotation is int:
+        return rng.randint(1, 10)
+    if annotation is float:
+        return rng.random()
+    if annotation is bool:
+        return True
+    return " ".join(rng.choice(VOCABULARY) for _ in range(6))
+
+
+def fake_instance(schema: type[BaseModel], rng: random.Random, list_items: Callable[[str], int] = lambda name: 3) -> BaseModel:
+    """ Populate every field of ``schema`` with deterministic values; ``list_items(field)`` sizes list fields """
+    values = {
+        name: _fake_value(field.annotation, rng, list_items, name)
+        for name, field in schema.model_fields.items()
+    }
+    return schema(**values)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that sleeps for a configurable time and returns filler text.
+
+    ``with_structured_output`` is supported for Pydantic schemas; the call
+    still goes through `_generate`, so callbacks see it as an LLM call.
+    """
+
+    model_name: str = "gpt-4o-mini"
+    latency: float = 0.0
+    token_latency: float = 0.0
+    response_tokens: int = 200
+    # Free-text responses to prompts containing a key run to at least that share of the prompt's tokens,
+    # like a writer rewriting its input (e.g. {"Write a report based upon these memos": 0.5})
+    output_ratios: dict[str, float] = {}
+    # Share of free-text responses ending with the analyst's sign-off, which ends an interview early
+    signoff_rate: float = 0.0
+    # Length of list fields in structured output, by field name (e.g. {"analysts": 5})
+    list_items: dict[str, int] = {}
+    default_list_items: int = 3
+    # Report prompt-cache hits like OpenAI: prefixes of earlier prompts, in 128-token blocks, from 1024 tokens
+    prefix_cache: bool = False
+    _prefixes: set = PrivateAttr(default_factory=set)
+    _prefixes_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _cached_tokens(self, messages: list[BaseMessage]) -> int:
+        """ Tokens of the longest block-aligned prefix seen in an earlier prompt; records this prompt's prefixes """
+        text = "".join(f"<{message.type}>{message.content}" for message in messages)
+        block_chars = 128 * 4  # `count_tokens` estimates 4 characters per token
+        digests, digest = [], b""
+        for start in range(0, len(text) - block_chars + 1, block_chars):
+            digest = hashlib.blake2b(digest + text[start:start + block_chars].encode(), digest_size=16).digest()
+            digests.append(digest)
+        with self._prefixes_lock:
+            hits = next((i for i, digest in enumerate(digests) if digest not in self._prefixes), len(digests))
+            self._prefixes.update(digests)
+        return hits * 128 if hits * 128 >= 1024 else 0
+
+    def _respond(self, messages: list[BaseMessage], schema: Optional[type[BaseModel]]) -> tuple[ChatResult, float]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        rng = _rng(prompt, schema.__name__ if schema else None)
+        if schema is not None:
+            sizes = lambda name: self.list_items.get(name, self.default_list_items)
+            content = fake_instance(schema, rng, sizes).model_dump_json()
+        else:
+            input_tokens = sum(count_tokens(str(message.content)) for message in messages)
+            ratio = max((r for marker, r in self.output_ratios.items() if marker in prompt), default=0.0)
+            content = filler_text(rng, max(self.response_tokens, int(ratio * input_tokens)))
+            if rng.random() < self.signoff_rate:
+                content += "\n\nThank you so much for your help!"
+        output_tokens = count_tokens(content)
+        input_tokens = sum(count_tokens(str(message.content)) for message in messages)
+        usage = {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+        if self.prefix_cache:
+            usage["input_token_details"] = {"cache_read": min(self._cached_tokens(messages), input_tokens)}
+        message = AIMessage(content=content, usage_metadata=usage)
+        delay = self.latency + self.token_latency * output_tokens
+        return ChatResult(generations=[ChatGeneration(message=message)]), delay
+
+    def _generate(self, messages, stop=None, run_manager=None, fake_schema=None, **kwargs) -> ChatResult:
+        result, delay = self._respond(messages, fake_schema)
+        time.sleep(delay)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, fake_schema=None, **kwargs) -> ChatResult:
+        result, delay = self._respond(messages, fake_schema)
+        await asyncio.sleep(delay)
+        return result
+
+    def with_structured_output(self, schema, **kwargs):
+        return self.bind(fake_schema=schema) | RunnableLambda(lambda message: schema.model_validate_json(message.content))
+
+
+class FakeSearch:
+    """Tavily and Wikipedia replacements returning ``results`` documents of ``doc_tokens`` each."""
+
+    def __init__(self, latency: float = 0.0, results: int = 3, doc_tokens: int = 500):
+        self.latency = latency
+        self.results = results
+        self.doc_tokens = doc_tokens
+
+    def _pages(self, source: str, query: str, count: int) -> list[tuple[str, str, str]]:
+        rng = _rng(source, query)
+        slug = hashlib.blake2b(query.encode(), digest_size=4).hexdigest()
+        return [
+            (f"https://{source}.bench.local/{slug}/{i}", f"{query} ({i})", filler_text(rng, self.doc_tokens))
+            for i in range(count)
+        ]
+
+    # TavilySearch interface
+    def invoke(self, input: dict) -> dict:
+        time.sleep(self.latency)
+        return self._tavily(input["query"])
+
+    async def ainvoke(self, input: dict) -> dict:
+        await asyncio.sleep(self.latency)
+        return self._tavily(input["query"])
+
+    def _tavily(self, query: str) -> dict:
+        return {
+            "query": query,
+            "results": [
+                {"url": url, "title": title, "content": content, "score": 1.0 / (i + 1)}
+                for i, (url, title, content) in enumerate(self._pages("web", query, self.results))
+            ],
+        }
+
+    def _wikipedia(self, query: str, load_max_docs: int) -> list[Document]:
+        return [
+            Document(page_content=content, metadata={"title": title, "source": url, "summary": content[:200]})
+            for url, title, content in self._pages("wikipedia", query, min(load_max_docs, self.results))
+        ]
+
+    # `dr_agent.search.wikipedia_search` and `awikipedia_search` interfaces
+    def wikipedia_search(self, query: str, load_max_docs: int = 2, **kwargs) -> list[Document]:
+        time.sleep(self.latency)
+        return self._wikipedia(query, load_max_docs)
+
+    async def awikipedia_search(self, query: str, load_max_docs: int = 2, **kwargs) -> list[Document]:
+        await asyncio.sleep(self.latency)
+        return self._wikipedia(query, load_max_docs)
+
+
+@contextmanager
+def use_fakes(llm: FakeChatModel, search: FakeSearch, models: Optional[dict[str, FakeChatModel]] = None):
+    """Route every node's model and search calls to the fakes for the duration of the block.
+
+    ``models`` maps model names (without the provider) to their own fakes, for
+    runs that use several models; every other model is served by ``llm``.
+    """
+    from dr_agent import async_nodes, nodes
+    from dr_agent.clients import llm_clients
+
+    models = models or {}
+    patches = [
+        (llm_clients, "get", lambda model, *args, **kwargs: models.get(model.rpartition("/")[2], llm)),
+        (nodes, "get_tavily_search", lambda: search),
+        (async_nodes, "get_tavily_search", lambda: search),
+        (nodes, "wikipedia_search", search.wikipedia_search),
+        (async_nodes, "awikipedia_search", search.awikipedia_search),
+    ]
+    saved = [(target, name, target.__dict__.get(name)) for target, name, _ in patches]
+    for target, name, value in patches:
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for target, name, value in saved:
+            if value is None:
+                delattr(target, name)
+            else:
+                setattr(target, name, value)
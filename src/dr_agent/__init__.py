@@ -1,3 +1,16 @@
-from dr_agent.graph import graph
+"""Deep research agent.
 
-__all__ = ["graph"]
\ No newline at end of file
+Submodules are imported on first use, so ``import dr_agent`` stays cheap.
+"""
+
+__all__ = ["graph"]
+
+
+def __getattr__(name: str):
+    if name == "graph":
+        from dr_agent.graph import graph
+
+        # Importing the submodule bound `dr_agent.graph` to it; keep exporting the factory
+        globals()["graph"] = graph
+        return graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,267 @@
+"""Async counterparts of the nodes in `dr_agent.nodes`.
+
+Node names and signatures mirror the sync module so `graph.py` can swap one
+for the other. Pure state transforms (routing, saving, finalizing) have no I/O
+and are re-exported from the sync module unchanged. Blocking work that is not
+a model or search call, such as section store lookups and interview digests,
+runs in worker threads.
+"""
+
+import asyncio
+from typing import Literal, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.types import Command, interrupt
+
+from dr_agent import nodes, prompts
+from dr_agent.configuration import Configuration
+from dr_agent.corpus import get_corpus
+from dr_agent.documents import Document, web_documents, wikipedia_documents
+from dr_agent.nodes import (
+    SearchQueries,
+    analyst_instructions,
+    answer_messages,
+    current_analysts,
+    draft_messages,
+    finalize_report,
+    get_llm,
+    interview_digest,
+    prewarm_interviews,
+    route_messages,
+    route_section,
+    save_interview,
+    search_instructions,
+    search_queries,
+    select_context,
+    store_section,
+    undrafted_sections,
+    warm_start_update,
+)
+from dr_agent.search import awikipedia_search, documents_to_json, get_tavily_search
+from dr_agent.retrieval import reciprocal_rank_fusion
+from dr_agent.search_cache import get_search_cache
+from dr_agent.prewarm import get_prewarmer
+from dr_agent.scheduler import arun_search
+from dr_agent.synthesis import batch_sections, join_sections, merge_drafts, needs_digest, ordered_drafts, pipelined, report_context
+from dr_agent.state import InterviewState, Perspectives, ResearchGraphState
+
+__all__ = [
+    "create_analysts",
+    "confirm_analysts",
+    "initiate_all_interviews",
+    "generate_question",
+    "generate_search_query",
+    "search_web",
+    "search_wikipedia",
+    "search_local_corpus",
+    "select_context",
+    "generate_answer",
+    "save_interview",
+    "route_messages",
+    "write_section",
+    "route_section",
+    "draft_section",
+    "digest_sections",
+    "write_report",
+    "write_introduction",
+    "write_conclusion",
+    "finalize_report",
+]
+
+# ---------------- Generate Analysts ----------------
+async def create_analysts(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
+    """ Create analysts, or revise the current ones with the feedback """
+    analysts = current_analysts(state)
+    if analysts and not state.get("human_analyst_feedback"):
+        # A roster passed in without feedback is used as is
+        prewarm_interviews(state, analysts, config)
+        return {"analysts": analysts}
+
+    llm = get_llm(config)
+    structured_llm = llm.with_structured_output(Perspectives)
+    system_message = analyst_instructions(state, analysts)
+
+    analysts = await structured_llm.ainvoke(
+        [SystemMessage(content=system_message)] + [HumanMessage(content=prompts.ANALYSTS_REQUEST)]
+    )
+    prewarm_interviews(state, analysts.analysts, config)
+    return {"analysts": analysts.analysts}
+
+async def confirm_analysts(state: ResearchGraphState):
+    """Interrupt to show generated analysts and ask user for feedback."""
+    analysts = state["analysts"]
+
+    return interrupt({
+        "message": "Here is the list of generated analysts. Press enter to confirm or provide feedback to regenerate.",
+        "generated_analysts": analysts
+    })
+
+async def initiate_all_interviews(state: ResearchGraphState, config: Optional[RunnableConfig] = None) -> Command[Literal["create_analysts", "conduct_interview", "digest_sections"]]:
+    """ The "map" step; its section store lookups (SQLite with a store path) run in a worker thread """
+    return await asyncio.to_thread(nodes.initiate_all_interviews, state, config)
+
+# ---------------- Conduct Interviews ----------------
+async def generate_question(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Node to generate a question """
+    # The first question may already have been asked speculatively during analyst review
+    if state.get("warm_key") and not state.get("num_turns"):
+        prewarmer = get_prewarmer(Configuration.from_runnable_config(config))
+        update = warm_start_update(await prewarmer.atake(state["warm_key"]) if prewarmer is not None else None)
+        if update is not None:
+            return update
+
+    analyst = state["analyst"]
+    messages = state["messages"]
+
+    llm = get_llm(config)
+    # Static instructions, then the persona, then the append-only interview: a stable prompt prefix
+    system_messages = prompts.QUESTION_INSTRUCTIONS.format(goals=analyst.persona)
+    question = await llm.ainvoke([SystemMessage(content=system_messages)] + messages)
+
+    return {"messages": [question]}
+
+async def generate_search_query(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Write diverse search queries per turn, shared by every retriever """
+    if state.get("warm_queries") and not state.get("num_turns"):
+        return {"search_queries": state["warm_queries"]}
+    configuration = Configuration.from_runnable_config(config)
+    llm = get_llm(config)
+    structured_llm = llm.with_structured_output(SearchQueries)
+    result = await structured_llm.ainvoke([search_instructions(configuration)] + state["messages"])
+
+    return {"search_queries": search_queries(state, result, configuration)}
+
+async def search_web(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Retrieve docs from web search, all queries concurrently, fused by rank """
+    configuration = Configuration.from_runnable_config(config)
+    cache = get_search_cache(configuration)
+
+    async def search(query: str) -> list[Document]:
+        return web_documents(await cache.afetch(
+            "web",
+            query,
+            configuration.search_cache_ttl_web,
+            lambda query: arun_search(configuration, "tavily", get_tavily_search().ainvoke, {"query": query}),
+        ))
+
+    rankings = await asyncio.gather(*(search(query) for query in state["search_queries"]))
+    return {"context": reciprocal_rank_fusion(rankings)}
+
+async def search_wikipedia(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Retrieve docs from wikipedia, all queries concurrently, fused by rank """
+    configuration = Configuration.from_runnable_config(config)
+    cache = get_search_cache(configuration)
+
+    async def load(query: str) -> list[dict]:
+        return documents_to_json(await arun_search(configuration, "wikipedia", awikipedia_search, query, load_max_docs=2))
+
+    async def search(query: str) -> list[Document]:
+        return wikipedia_documents(
+            await cache.afetch("wikipedia", query, configuration.search_cache_ttl_wikipedia, load)
+        )
+
+    rankings = await asyncio.gather(*(search(query) for query in state["search_queries"]))
+    return {"context": reciprocal_rank_fusion(rankings)}
+
+async def search_local_corpus(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Retrieve chunks from the local document corpus, all queries concurrently in worker threads, fused by rank """
+    configuration = Configuration.from_runnable_config(config)
+    # The first call may index the corpus, so it runs off the event loop too
+    corpus = await asyncio.to_thread(get_corpus, configuration)
+    if corpus is None:
+        return {"context": []}
+
+    rankings = await asyncio.gather(*(
+        asyncio.to_thread(corpus.search, query, configuration.local_corpus_top_k)
+        for query in state["search_queries"]
+    ))
+    return {"context": reciprocal_rank_fusion(rankings)}
+
+async def generate_answer(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Node to answer a question """
+    llm = get_llm(config)
+    answer = await llm.ainvoke(answer_messages(state))
+
+    answer.name = "expert"
+    return {"messages": [answer], "num_turns": state.get("num_turns", 0) + 1}
+
+async def write_section(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Node to write a report section from a compact digest of the interview """
+    configuration = Configuration.from_runnable_config(config)
+    analyst = state["analyst"]
+
+    llm = get_llm(config)
+    system_message = prompts.SECTION_WRITER_INSTRUCTIONS.format(focus=analyst.description)
+    # BM25 over the whole interview context, and a SQLite commit with a store path: both off the loop
+    digest = await asyncio.to_thread(interview_digest, state, configuration)
+    section = await llm.ainvoke([SystemMessage(content=system_message)]+[HumanMessage(content=prompts.SECTION_REQUEST.format(digest=digest))])
+    await asyncio.to_thread(store_section, state, section.content, configuration)
+
+    return {"sections": [section.content]}
+
+async def draft_section(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Node to draft this interview's part of the report body as soon as its section is written """
+    section = state["sections"][-1]
+    draft = await get_llm(config).ainvoke(draft_messages(state["topic"], section))
+    return {"drafts": [{"section": section, "draft": draft.content}]}
+
+# ---------------- Finalize Report ----------------
+async def digest_sections(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
+    """ Map-reduce the sections into a compact digest when they are too large to send whole """
+    configuration = Configuration.from_runnable_config(config)
+    sections = state["sections"]
+    if pipelined(configuration.synthesis_mode):
+        # The drafts are already condensed; only sections that skipped the interview still need one
+        missing = undrafted_sections(state)
+        drafts = await get_llm(config).abatch([draft_messages(state["topic"], section) for section in missing]) if missing else []
+        return {"digest": "", "drafts": [{"section": s, "draft": d.content} for s, d in zip(missing, drafts)]}
+    if not needs_digest(sections, configuration.synthesis_token_threshold):
+        return {"digest": ""}
+
+    llm = get_llm(config)
+    instructions = prompts.SECTION_DIGEST_INSTRUCTIONS.format(topic=state["topic"])
+    parts = sections
+    for _ in range(configuration.synthesis_max_rounds):
+        batches = batch_sections(parts, configuration.synthesis_batch_tokens)
+        # Map: digest every batch concurrently
+        digests = await llm.abatch(
+            [[SystemMessage(content=instructions), HumanMessage(content=join_sections(batch))] for batch in batches]
+        )
+        parts = [d.content for d in digests]
+        # Reduce: stop once the combined digests fit, otherwise digest the digests
+        if len(parts) == 1 or not needs_digest(parts, configuration.synthesis_token_threshold):
+            break
+    return {"digest": join_sections(parts)}
+
+async def write_report(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
+    topic = state["topic"]
+    if pipelined(Configuration.from_runnable_config(config).synthesis_mode):
+        # Combining the drafts needs no model call
+        return {"content": merge_drafts(ordered_drafts(state))}
+
+    llm = get_llm(config)
+    formatted_str_sections = report_context(state)
+    system_messages = [SystemMessage(
+        content=prompts.REPORT_WRITER_INSTRUCTIONS.format(topic=topic, context=formatted_str_sections)
+    )]
+    report = await llm.ainvoke(system_messages + [HumanMessage(content=prompts.REPORT_REQUEST)])
+    return {"content": report.content}
+
+async def write_introduction(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
+    topic = state["topic"]
+
+    llm = get_llm(config)
+    formatted_str_sections = report_context(state)
+    instructions = prompts.INTRO_CONCLUSION_INSTRUCTIONS.format(topic=topic, formatted_str_sections=formatted_str_sections)
+    intro = await llm.ainvoke([SystemMessage(content=instructions)]+[HumanMessage(content=prompts.INTRODUCTION_REQUEST)])
+    return {"introduction": intro.content}
+
+async def write_conclusion(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
+    topic = state["topic"]
+
+    llm = get_llm(config)
+    formatted_str_sections = report_context(state)
+    instructions = prompts.INTRO_CONCLUSION_INSTRUCTIONS.format(topic=topic, formatted_str_sections=formatted_str_sections)
+    conclusion = await llm.ainvoke([SystemMessage(content=instructions)]+[HumanMessage(content=prompts.CONCLUSION_REQUEST)])
+    return {"conclusion": conclusion.content}
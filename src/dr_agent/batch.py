@@ -0,0 +1,212 @@
+"""Run many research topics concurrently, unattended.
+
+Topics come from a JSONL file, one object per line:
+
+    {"topic": "...", "id": "optional-stable-id", "max_analysts": 3, "max_num_turns": 2,
+     "feedback": ["optional analyst feedback, one entry per revision round"]}
+
+All topics share one async graph, so the per-provider limiters and the
+search/response caches are shared too; ``concurrency`` caps how many topics
+are in flight. The ``confirm_analysts`` interrupt is answered from
+``feedback`` and then auto-confirmed. Each report is written to
+``<output>/<id>.md`` as soon as it is done and recorded in
+``<output>/manifest.jsonl``.
+
+Checkpoints go to ``<output>/checkpoints.sqlite`` (thread id = topic id)
+unless another durable backend is configured, so after a crash a re-run
+skips finished topics and resumes the others from their last step.
+
+    python -m dr_agent.batch topics.jsonl --output reports/ [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.types import Command
+
+from dr_agent.checkpointer import aclose_checkpointer, asetup_checkpointer
+from dr_agent.graph import create_research_graph
+
+MANIFEST = "manifest.jsonl"
+_ID = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+@dataclass
+class BatchTopic:
+    topic: str
+    id: str = ""
+    max_analysts: int = 3
+    max_num_turns: int = 2
+    # Analyst feedback for successive confirm_analysts rounds; then the analysts are confirmed
+    feedback: list[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        if not self.id:
+            digest = hashlib.blake2b(self.topic.encode("utf-8"), digest_size=4).hexdigest()
+            self.id = f"{_ID.sub('-', self.topic.lower()).strip('-')[:48]}-{digest}"
+        elif _ID.search(self.id):
+            raise ValueError(f"Topic id {self.id!r} may only contain letters, digits, '_', '.' and '-'")
+        if isinstance(self.feedback, str):
+            self.feedback = [self.feedback]
+
+
+def load_topics(path: str, max_analysts: int = 3, max_num_turns: int = 2) -> list[BatchTopic]:
+    """ Parse a JSONL topics file; ``max_analysts``/``max_num_turns`` are the defaults for lines without them """
+    topics, ids = [], set()
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"topic": record}
+            topic = BatchTopic(**{"max_analysts": max_analysts, "max_num_turns": max_num_turns, **record})
+            if topic.id in ids:
+                raise ValueError(f"{path}:{line_number}: duplicate topic id {topic.id!r}")
+            ids.add(topic.id)
+            topics.append(topic)
+    return topics
+
+
+def batch_config(output_dir: str, config: Optional[RunnableConfig] = None) -> RunnableConfig:
+    """ ``config`` with the batch defaults: SQLite checkpoints, search cache and section store inside ``output_dir`` """
+    configurable = dict((config or {}).get("configurable", {}))
+    if configurable.get("checkpointer_backend", "memory") == "memory":
+        configurable["checkpointer_backend"] = "sqlite"
+        configurable["checkpointer_uri"] = str(Path(output_dir) / "checkpoints.sqlite")
+    configurable.setdefault("search_cache_path", str(Path(output_dir) / "search_cache.sqlite"))
+    configurable.setdefault("section_store_path", str(Path(output_dir) / "sections.sqlite"))
+    return {**(config or {}), "configurable": configurable}
+
+
+def _write_report(path: Path, report: str) -> None:
+    # Write-then-rename, so a report file on disk is always complete
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(report, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+async def _feedback_rounds(graph, config: RunnableConfig) -> int:
+    """ How many confirm_analysts rounds this thread has already been through """
+    rounds = 0
+    async for snapshot in graph.aget_state_history(config):
+        if snapshot.next == ("confirm_analysts",):
+            rounds += 1
+    return rounds
+
+
+async def arun_topic(graph, topic: BatchTopic, config: RunnableConfig) -> str:
+    """Drive one topic to its final report, resuming its thread if it has checkpoints.
+
+    Each confirm_analysts interrupt is answered with the next ``feedback``
+    entry, or confirms the analysts once they are used up.
+    """
+    config = {**config, "configurable": {**config.get("configurable", {}), "thread_id": topic.id}}
+    state = await graph.aget_state(config)
+    # A thread with checkpoints continues from its last step (None input)
+    command = None
+    if not state.values:
+        command = {"topic": topic.topic, "max_analysts": topic.max_analysts, "max_num_turns": topic.max_num_turns}
+
+    while command is not None or state.next:
+        if state.interrupts:
+            rounds = await _feedback_rounds(graph, config)
+            feedback = topic.feedback[rounds - 1] if rounds <= len(topic.feedback) else None
+            command = Command(resume={"human_analyst_feedback": feedback})
+        await graph.ainvoke(command, config)
+        command = None
+        state = await graph.aget_state(config)
+    return state.values["final_report"]
+
+
+async def arun_batch(
+    topics: list[BatchTopic],
+    output_dir: str,
+    concurrency: int = 4,
+    config: Optional[RunnableConfig] = None,
+) -> list[dict]:
+    """Run every topic without a report in ``output_dir`` yet, at most ``concurrency`` at a time.
+
+    Returns one manifest record per topic run in this call (status "done"
+    or "error"); failed topics are retried, from their last checkpoint, by
+    the next call.
+    """
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    config = batch_config(output_dir, config)
+    pending = [topic for topic in topics if not (output / f"{topic.id}.md").exists()]
+    if not pending:
+        return []
+
+    graph = create_research_graph(async_mode=True, config=config)
+    await asetup_checkpointer(graph.checkpointer)
+    semaphore = asyncio.Semaphore(concurrency)
+    records = []
+
+    async def run(topic: BatchTopic) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            record = {"id": topic.id, "topic": topic.topic}
+            try:
+                report = await arun_topic(graph, topic, config)
+                _write_report(output / f"{topic.id}.md", report)
+                record.update(status="done", report=f"{topic.id}.md")
+            except Exception as e:
+                record.update(status="error", error=f"{type(e).__name__}: {e}")
+            record["seconds"] = round(time.perf_counter() - start, 3)
+            with open(output / MANIFEST, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            records.append(record)
+
+    try:
+        await asyncio.gather(*(run(topic) for topic in pending))
+    finally:
+        await aclose_checkpointer(graph.checkpointer)
+    return records
+
+
+def run_batch(
+    topics: list[BatchTopic],
+    output_dir: str,
+    concurrency: int = 4,
+    config: Optional[RunnableConfig] = None,
+) -> list[dict]:
+    """ Blocking `arun_batch` """
+    return asyncio.run(arun_batch(topics, output_dir, concurrency, config))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a JSONL file of research topics concurrently")
+    parser.add_argument("topics", help="JSONL file of topics")
+    parser.add_argument("--output", required=True, help="Directory for reports, manifest, checkpoints and caches")
+    parser.add_argument("--concurrency", type=int, default=4, help="Topics in flight at once")
+    parser.add_argument("--analysts", type=int, default=3, help="Default max_analysts per topic")
+    parser.add_argument("--turns", type=int, default=2, help="Default max_num_turns per topic")
+    parser.add_argument(
+        "--config", help="JSON object of Configuration fields, e.g. '{\"model\": \"openai/gpt-4o\"}'"
+    )
+    args = parser.parse_args()
+
+    topics = load_topics(args.topics, args.analysts, args.turns)
+    config = {"configurable": json.loads(args.config)} if args.config else None
+    records = run_batch(topics, args.output, args.concurrency, config)
+    done = sum(record["status"] == "done" for record in records)
+    print(json.dumps({
+        "topics": len(topics),
+        "already_done": len(topics) - len(records),
+        "done": done,
+        "errors": len(records) - done,
+    }))
+
+
+if __name__ == "__main__":
+    main()
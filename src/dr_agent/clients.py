@@ -0,0 +1,132 @@
+"""Process-wide registry of pooled chat model clients.
+
+Provider packages are imported, and ``.env`` is loaded, when the first client
+is built rather than on import, so the graph can be imported and compiled
+without API keys.
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+import httpx
+from langchain_core.caches import BaseCache
+
+from dr_agent.scheduler import AsyncRateLimitedTransport, RateLimitedTransport
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+
+class ClientKey(NamedTuple):
+    provider: str
+    model: str
+    cache: Optional[BaseCache] = None
+
+
+def parse_model(model: str) -> ClientKey:
+    """ Split a "provider/model-name" string into its parts """
+    provider, _, model_name = model.rpartition("/")
+    return ClientKey(provider=provider or "openai", model=model_name)
+
+
+@functools.cache
+def load_env() -> None:
+    """ Load API keys from a .env file into the environment, once, before the first client is built """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+class LLMClientRegistry:
+    """Bounded LRU registry of chat model clients keyed by resolved model settings.
+
+    All clients share one keep-alive HTTP connection pool (sync and async), so
+    a long-running server re-uses warm TLS connections across threads and runs.
+    Requests on the pool are admitted by the per-provider limiters in
+    `dr_agent.scheduler`.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 16,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+    ):
+        self.max_size = max_size
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._clients: OrderedDict[ClientKey, "ChatOpenAI"] = OrderedDict()
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, model: str, cache: Optional[BaseCache] = None) -> "ChatOpenAI":
+        """ Return the pooled client for a "provider/model-name" string and response cache """
+        key = parse_model(model)._replace(cache=cache)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self._hits += 1
+                return client
+
+            self._misses += 1
+            client = self._build(key)
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                # The shared HTTP pool outlives evicted clients, so nothing to close here
+                self._clients.popitem(last=False)
+                self._evictions += 1
+            return client
+
+    def _build(self, key: ClientKey) -> "ChatOpenAI":
+        load_env()
+        from langchain_openai import ChatOpenAI
+
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                transport=RateLimitedTransport(httpx.HTTPTransport(limits=self._limits))
+            )
+            self._http_async_client = httpx.AsyncClient(
+                transport=AsyncRateLimitedTransport(httpx.AsyncHTTPTransport(limits=self._limits))
+            )
+        return ChatOpenAI(
+            model=key.model,
+            cache=key.cache,
+            http_client=self._http_client,
+            http_async_client=self._http_async_client,
+        )
+
+    def stats(self) -> dict:
+        """ Hit/miss counters and the number of live clients """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "live_clients": len(self._clients),
+                "max_size": self.max_size,
+            }
+
+    def clear(self) -> None:
+        """ Drop every cached client and close the shared connection pool """
+        with self._lock:
+            self._clients.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+            # The async pool is released with the event loop that used it
+            self._http_client = None
+            self._http_async_client = None
+
+
+# Shared by every node in the process
+llm_clients = LLMClientRegistry()
@@ -9,7 +9,19 @@ from langchain_core.runnables import RunnableConfig, ensure_config
 from langgraph.config import get_config
 
 from dr_agent import prompts
-from dotenv import load_dotenv
+from dr_agent.documents import DEFAULT_CONTEXT_TOKEN_BUDGET
+
+# Model tier of the nodes that do not use `model`: short structured turns on the fast
+# model, the writing that ends up in the report on the strong one
+DEFAULT_NODE_MODELS = {
+    "ask_question": "fast",
+    "generate_search_query": "fast",
+    "write_section": "strong",
+    "draft_section": "strong",
+    "write_report": "strong",
+    "write_introduction": "strong",
+    "write_conclusion": "strong",
+}
 
 @dataclass(kw_only=True)
 class Configuration:
@@ -32,6 +44,30 @@ class Configuration:
         },
     )
 
+    fast_model: str = field(
+        default="openai/gpt-4.1-nano",
+        metadata={
+            "description": "Model of the 'fast' tier, for short calls such as questions and search queries."
+        },
+    )
+
+    strong_model: Optional[str] = field(
+        default=None,
+        metadata={
+            "description": "Model of the 'strong' tier, for the sections and the report; None uses `model`. "
+            "A larger model here costs more: openai/gpt-4.1 is about 13x the per-token price of gpt-4o-mini, "
+            "and these nodes write most of the output tokens."
+        },
+    )
+
+    node_models: dict[str, str] = field(
+        default_factory=lambda: dict(DEFAULT_NODE_MODELS),
+        metadata={
+            "description": "Model of each node, by node name: 'fast', 'strong' or a provider/model-name. "
+            "Nodes not listed use `model`; an empty map runs every node on `model`."
+        },
+    )
+
     max_search_results: int = field(
         default=10,
         metadata={
@@ -39,6 +75,337 @@ class Configuration:
         },
     )
 
+    context_token_budget: int = field(
+        default=DEFAULT_CONTEXT_TOKEN_BUDGET,
+        metadata={
+            "description": "Maximum estimated tokens of retrieved documents kept per interview. "
+            "Duplicates are dropped and the lowest-ranked documents are evicted beyond this budget."
+        },
+    )
+
+    search_queries_per_turn: int = field(
+        default=3,
+        metadata={
+            "description": "Diverse search queries written per interview turn. Each retriever runs them "
+            "concurrently and merges the results with reciprocal-rank fusion."
+        },
+    )
+
+    local_corpus_path: Optional[str] = field(
+        default=None,
+        metadata={
+            "description": "Directory of Markdown, text and PDF files searched alongside the web and Wikipedia. "
+            "When unset, the local corpus retriever returns nothing."
+        },
+    )
+
+    local_corpus_index_path: Optional[str] = field(
+        default=None,
+        metadata={
+            "description": "Directory of the local corpus vector index. Defaults to `.dr_agent_index` inside the corpus."
+        },
+    )
+
+    local_corpus_embeddings: str = field(
+        default="hashing",
+        metadata={
+            "description": "Embedder for the local corpus: 'hashing' for the built-in offline embedder, "
+            "or a \"provider/model-name\" embedding model such as 'openai/text-embedding-3-small'."
+        },
+    )
+
+    local_corpus_top_k: int = field(
+        default=6,
+        metadata={
+            "description": "Chunks retrieved from the local corpus per search query."
+        },
+    )
+
+    local_corpus_refresh_seconds: Optional[float] = field(
+        default=300.0,
+        metadata={
+            "description": "Minimum seconds between scans of the corpus for changed files. "
+            "None indexes once per process."
+        },
+    )
+
+    rerank_enabled: bool = field(
+        default=True,
+        metadata={
+            "description": "Whether to answer from the most relevant context chunks (BM25) instead of every retrieved document."
+        },
+    )
+
+    rerank_top_k: int = field(
+        default=8,
+        metadata={
+            "description": "Maximum number of context chunks passed to answer generation."
+        },
+    )
+
+    rerank_token_budget: int = field(
+        default=2000,
+        metadata={
+            "description": "Maximum estimated tokens of context chunks passed to answer generation."
+        },
+    )
+
+    chunk_tokens: int = field(
+        default=256,
+        metadata={
+            "description": "Approximate size in tokens of the chunks documents are split into for reranking."
+        },
+    )
+
+    novelty_threshold: Optional[float] = field(
+        default=0.2,
+        metadata={
+            "description": "End an interview before max_num_turns once less than this share of an answer's context "
+            "is new compared with earlier turns. None always runs max_num_turns."
+        },
+    )
+
+    novelty_similarity: float = field(
+        default=0.9,
+        metadata={
+            "description": "Cosine similarity at which a context chunk counts as a repeat of one used in an earlier turn."
+        },
+    )
+
+    section_digest_tokens: int = field(
+        default=2500,
+        metadata={
+            "description": "Hard cap on the estimated tokens of the interview digest (cited facts, source excerpts "
+            "and their sources) each section is written from."
+        },
+    )
+
+    section_store_enabled: bool = field(
+        default=False,
+        metadata={
+            "description": "Reuse finished sections for analysts whose persona is unchanged, so a revised roster only "
+            "interviews new or changed analysts. Sections are keyed by topic, analyst, max_num_turns, the interview "
+            "models and the retrieval settings, and are shared by every thread using the same store; off by default."
+        },
+    )
+
+    section_store_path: Optional[str] = field(
+        default=None,
+        metadata={
+            "description": "Path of the on-disk SQLite section store, shared across runs and threads. "
+            "When unset, sections are only kept in process memory."
+        },
+    )
+
+    section_store_ttl: Optional[float] = field(
+        default=24 * 60 * 60,
+        metadata={
+            "description": "Seconds a stored section stays reusable; None keeps them forever."
+        },
+    )
+
+    speculative_prewarm: bool = field(
+        default=False,
+        metadata={
+            "description": "While the graph waits at the confirm_analysts interrupt, run each proposed analyst's first "
+            "question, search queries and retrieval in the background, so confirmed interviews start warm."
+        },
+    )
+
+    prewarm_max_workers: int = field(
+        default=4,
+        metadata={
+            "description": "Background threads running speculative first turns."
+        },
+    )
+
+    synthesis_token_threshold: int = field(
+        default=12000,
+        metadata={
+            "description": "Estimated tokens of combined sections above which they are digested map-reduce style "
+            "before writing the report, introduction and conclusion."
+        },
+    )
+
+    synthesis_batch_tokens: int = field(
+        default=6000,
+        metadata={
+            "description": "Maximum estimated tokens of sections digested together in one parallel batch."
+        },
+    )
+
+    synthesis_max_rounds: int = field(
+        default=3,
+        metadata={
+            "description": "Maximum number of digest rounds before the report is written from whatever remains."
+        },
+    )
+
+    synthesis_mode: str = field(
+        default="batch",
+        metadata={
+            "description": "How the report body is written. 'batch': one writer reads every section once all interviews "
+            "are done. 'pipelined': each interview drafts its own part as soon as its section is written, and the "
+            "drafts are merged without another model call."
+        },
+    )
+
+    search_cache_enabled: bool = field(
+        default=True,
+        metadata={
+            "description": "Whether to cache Tavily and Wikipedia results by normalized query."
+        },
+    )
+
+    search_cache_path: Optional[str] = field(
+        default=None,
+        metadata={
+            "description": "Path of the on-disk SQLite search cache. "
+            "When unset, only the in-memory tier is used."
+        },
+    )
+
+    search_cache_max_entries: int = field(
+        default=1024,
+        metadata={
+            "description": "Maximum number of entries kept in the in-memory search cache tier."
+        },
+    )
+
+    search_cache_ttl_web: float = field(
+        default=6 * 60 * 60,
+        metadata={
+            "description": "Seconds a cached Tavily result stays fresh."
+        },
+    )
+
+    search_cache_ttl_wikipedia: float = field(
+        default=7 * 24 * 60 * 60,
+        metadata={
+            "description": "Seconds a cached Wikipedia result stays fresh."
+        },
+    )
+
+    llm_cache_enabled: bool = field(
+        default=False,
+        metadata={
+            "description": "Whether to cache model responses keyed on the rendered messages and model settings."
+        },
+    )
+
+    llm_cache_max_entries: int = field(
+        default=1024,
+        metadata={
+            "description": "Maximum number of cached model responses before LRU eviction."
+        },
+    )
+
+    llm_cache_similarity_threshold: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "Cosine similarity at which a cached response for a near-identical prompt is reused, "
+            "compared over the filled-in parts of prompts built from the same templates. Use 0.95 or higher: "
+            "prompts on related but different topics or analysts score up to about 0.92. "
+            "When unset, only exact matches hit the cache."
+        },
+    )
+
+    checkpointer_backend: str = field(
+        default="memory",
+        metadata={
+            "description": "Where graph checkpoints are stored when the graph is compiled: "
+            "'memory', 'sqlite' or 'postgres'."
+        },
+    )
+
+    checkpointer_uri: Optional[str] = field(
+        default=None,
+        metadata={
+            "description": "SQLite file path or Postgres connection string for the durable checkpointer backends."
+        },
+    )
+
+    checkpoint_retention_seconds: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "Delete threads whose latest checkpoint is older than this many seconds. "
+            "When unset, threads are kept forever."
+        },
+    )
+
+    rate_limit_enabled: bool = field(
+        default=True,
+        metadata={
+            "description": "Schedule model and search calls through shared per-provider limiters "
+            "(concurrency, requests/min, tokens/min, backoff on 429s)."
+        },
+    )
+
+    llm_max_concurrency: Optional[int] = field(
+        default=16,
+        metadata={
+            "description": "Maximum concurrent model requests per provider across the process; None for no limit."
+        },
+    )
+
+    llm_requests_per_minute: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "Model requests per minute per provider. When unset, the limit reported in "
+            "the provider's x-ratelimit headers is adopted."
+        },
+    )
+
+    llm_tokens_per_minute: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "Estimated model tokens (prompt + max completion) per minute per provider. "
+            "When unset, the limit reported in the provider's x-ratelimit headers is adopted."
+        },
+    )
+
+    search_max_concurrency: Optional[int] = field(
+        default=8,
+        metadata={
+            "description": "Maximum concurrent calls per search backend across the process; None for no limit."
+        },
+    )
+
+    search_requests_per_minute: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "Calls per minute per search backend; None for no limit."
+        },
+    )
+
+    rate_limit_max_backoff: float = field(
+        default=60.0,
+        metadata={
+            "description": "Longest pause, in seconds, applied to a provider after a 429 or an exhausted rate limit."
+        },
+    )
+
+    telemetry_enabled: bool = field(
+        default=False,
+        metadata={
+            "description": "Record per-node timing, tokens and cost with a callback handler attached to the compiled graph."
+        },
+    )
+
+    telemetry_exporters: str = field(
+        default="opentelemetry,prometheus",
+        metadata={
+            "description": "Comma-separated exporters for the node telemetry: 'opentelemetry' (spans) "
+            "and/or 'prometheus' (counters and histograms). Empty keeps records in process only."
+        },
+    )
+
+    def model_for(self, node: Optional[str]) -> str:
+        """ The provider/model-name a node calls, resolving tier names """
+        choice = self.node_models.get(node, "") if node else ""
+        tiers = {"": self.model, "fast": self.fast_model, "strong": self.strong_model or self.model}
+        return tiers.get(choice, choice)
+
     @classmethod
     def from_runnable_config(cls, config: Optional[RunnableConfig] = None) -> Configuration:
         """Create a Configuration instance from a RunnableConfig object."""
@@ -0,0 +1,467 @@
+"""Local document corpus with incremental ingestion and a memory-mapped vector index.
+
+Files under a root directory (Markdown, text and, with ``pypdf`` installed,
+PDFs) are split into chunks, embedded and stored on disk in an index
+directory:
+
+- ``vectors.f32``: one L2-normalized float32 row per chunk, memory-mapped for search
+- ``corpus.sqlite``: file fingerprints, chunk text and each chunk's row in the vector file
+
+`LocalCorpus.refresh` only re-embeds files whose size/mtime and content hash
+changed; rows of changed or deleted files are tombstoned and reclaimed by
+compaction once they outnumber the live rows. Searches keep using the
+current index while a refresh runs. Search is an exact
+inner-product scan in fixed-size blocks, which stays in the tens of
+milliseconds for a few hundred thousand chunks once the file is in the page
+cache.
+
+    python -m dr_agent.corpus ./docs [--index ./docs/.dr_agent_index]
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from dr_agent.clients import load_env, parse_model
+from dr_agent.configuration import Configuration
+from dr_agent.documents import Document
+from dr_agent.embeddings import HashingEmbeddings
+from dr_agent.retrieval import chunk_text
+
+DEFAULT_PATTERNS = ("*.md", "*.markdown", "*.txt", "*.rst", "*.pdf")
+INDEX_DIRNAME = ".dr_agent_index"
+
+
+def read_pages(path: Path) -> list[tuple[str, str]]:
+    """ ``(page, text)`` pairs of a file; pages are 1-based for PDFs and empty for plain text """
+    if path.suffix.lower() != ".pdf":
+        return [("", path.read_text(encoding="utf-8", errors="ignore"))]
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ImportError("Indexing PDFs needs pypdf: pip install \"deep-research[pdf]\"") from e
+    return [(str(number), page.extract_text() or "") for number, page in enumerate(PdfReader(path).pages, start=1)]
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_embeddings(name: str) -> Embeddings:
+    """ "hashing" for the built-in `HashingEmbeddings`, otherwise a "provider/model-name" embedding model """
+    if name == "hashing":
+        return HashingEmbeddings()
+    key = parse_model(name)
+    if key.provider != "openai":
+        raise ValueError(f"Unsupported embeddings provider {key.provider!r}; use 'hashing' or 'openai/<model>'")
+    load_env()
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=key.model)
+
+
+class LocalCorpus:
+    """Incrementally indexed chunks of the files under ``root``.
+
+    Safe to share between threads. `refresh` reads and embeds files without
+    the index lock and takes it only to write each file's rows, so searches
+    keep reading the memory-mapped vectors meanwhile. Compaction renumbers
+    rows; it bumps a generation counter so that a search that scored the old
+    rows scores them again.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        index_path: Optional[str] = None,
+        embeddings: Optional[Embeddings] = None,
+        chunk_tokens: int = 256,
+        patterns: tuple[str, ...] = DEFAULT_PATTERNS,
+        block_rows: int = 65536,
+        embed_batch_size: int = 256,
+    ):
+        self.root = Path(root).resolve()
+        self.index_path = Path(index_path) if index_path else self.root / INDEX_DIRNAME
+        self.embeddings = embeddings or HashingEmbeddings()
+        self.chunk_tokens = chunk_tokens
+        self.patterns = patterns
+        self.block_rows = block_rows
+        self.embed_batch_size = embed_batch_size
+        self.last_refresh = 0.0
+        self.last_refresh_error: Optional[BaseException] = None
+
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.index_path / "vectors.f32"
+        self._lock = threading.RLock()
+        # One refresh at a time; searches only wait for `_lock`
+        self._refresh_lock = threading.RLock()
+        self._refreshing = False
+        self._generation = 0
+        self._conn = sqlite3.connect(self.index_path / "corpus.sqlite", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, digest TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY, path TEXT NOT NULL, page TEXT NOT NULL,
+                chunk INTEGER NOT NULL, content TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_path ON chunks (path);
+            """
+        )
+        self._dim: Optional[int] = None
+        self._count = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._live = np.zeros(0, dtype=bool)
+        self._load()
+
+    # ---------------- Index state ----------------
+    def _embedder_id(self) -> str:
+        embeddings = self.embeddings
+        return f"{type(embeddings).__module__}.{type(embeddings).__qualname__}:{getattr(embeddings, 'dim', '')}:{getattr(embeddings, 'model', '')}"
+
+    def _identity(self) -> dict:
+        """ Settings the stored chunks and vectors were built with; an index built otherwise is rebuilt """
+        return {"embedder": self._embedder_id(), "chunk_tokens": self.chunk_tokens}
+
+    def _meta(self) -> dict:
+        return {key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM meta")}
+
+    def _set_meta(self, **values) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in values.items()],
+        )
+
+    def _load(self) -> None:
+        with self._lock:
+            meta = self._meta()
+            if meta and any(meta.get(key) != value for key, value in self._identity().items()):
+                # Vectors from another embedder are not comparable, and chunks of another size do not match
+                # the configured chunking; start over
+                self._reset()
+                meta = {}
+            self._dim = meta.get("dim")
+            self._count = meta.get("count", 0)
+            self._open_vectors()
+
+    def _reset(self) -> None:
+        self._conn.executescript("DELETE FROM meta; DELETE FROM files; DELETE FROM chunks;")
+        self._conn.commit()
+        self._generation += 1
+        self._vectors = None
+        self._vectors_path.unlink(missing_ok=True)
+
+    def _open_vectors(self) -> None:
+        self._live = np.zeros(self._count, dtype=bool)
+        rows = np.fromiter((row for (row,) in self._conn.execute("SELECT row FROM chunks")), dtype=np.int64)
+        self._live[rows[rows < self._count]] = True
+        if self._count and self._dim:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._count, self._dim))
+        else:
+            self._vectors = None
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        if hasattr(self.embeddings, "embed"):
+            matrix = np.asarray(self.embeddings.embed(texts), dtype=np.float32)
+        else:
+            matrix = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def _embed_query(self, text: str) -> np.ndarray:
+        if hasattr(self.embeddings, "embed"):
+            vector = np.asarray(self.embeddings.embed([text])[0], dtype=np.float32)
+        else:
+            vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # ---------------- Ingestion ----------------
+    def _files(self) -> Iterator[Path]:
+        for directory, dirnames, filenames in os.walk(self.root):
+            # Skip hidden directories, including the index itself
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                if any(fnmatch.fnmatch(filename.lower(), pattern) for pattern in self.patterns):
+                    yield Path(directory) / filename
+
+    def _embed_pages(self, pages: list[tuple[str, str]]) -> list[tuple[list[tuple[str, int, str]], np.ndarray]]:
+        """ Chunk and embed a file's pages, in batches of ``(page, chunk index, text)`` with their vectors """
+        chunks = [
+            (page, index, text)
+            for page, page_text in pages
+            for index, text in enumerate(chunk_text(page_text, self.chunk_tokens))
+        ]
+        batches = []
+        for start in range(0, len(chunks), self.embed_batch_size):
+            batch = chunks[start:start + self.embed_batch_size]
+            batches.append((batch, self._embed([text for _, _, text in batch])))
+        return batches
+
+    def _append(self, path: str, batches: list[tuple[list[tuple[str, int, str]], np.ndarray]]) -> int:
+        for batch, matrix in batches:
+            if self._dim is None:
+                self._dim = matrix.shape[1]
+            with open(self._vectors_path, "ab") as f:
+                # Drop bytes past the committed row count, left by an interrupted refresh
+                f.truncate(self._count * self._dim * 4)
+                f.write(matrix.tobytes())
+            self._conn.executemany(
+                "INSERT INTO chunks (row, path, page, chunk, content) VALUES (?, ?, ?, ?, ?)",
+                [(self._count + i, path, page, index, text) for i, (page, index, text) in enumerate(batch)],
+            )
+            self._count += len(batch)
+        return sum(len(batch) for batch, _ in batches)
+
+    def refresh(self) -> dict:
+        """Bring the index up to date with the files on disk; returns counts of what changed.
+
+        Files are read and embedded outside the index lock; each changed
+        file's rows are written under it.
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0, "chunks_added": 0}
+        with self._refresh_lock:
+            with self._lock:
+                known = {
+                    path: (mtime_ns, size, digest)
+                    for path, mtime_ns, size, digest in self._conn.execute("SELECT path, mtime_ns, size, digest FROM files")
+                }
+            seen = set()
+            for file in self._files():
+                path = file.relative_to(self.root).as_posix()
+                seen.add(path)
+                stat = file.stat()
+                previous = known.get(path)
+                if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                    counts["unchanged"] += 1
+                    continue
+                digest = file_digest(file)
+                batches = None
+                if previous is not None and previous[2] == digest:
+                    counts["unchanged"] += 1
+                else:
+                    try:
+                        pages = read_pages(file)
+                    except ImportError:
+                        raise
+                    except Exception:
+                        # Unreadable (e.g. corrupt PDF): record it so it is retried only once it changes
+                        pages = []
+                        counts["failed"] += 1
+                    batches = self._embed_pages(pages)
+                    counts["updated" if previous is not None else "added"] += 1
+                with self._lock:
+                    if batches is not None:
+                        if previous is not None:
+                            self._conn.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                        counts["chunks_added"] += self._append(path, batches)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)",
+                        (path, stat.st_mtime_ns, stat.st_size, digest),
+                    )
+                    self._set_meta(dim=self._dim, count=self._count, **self._identity())
+                    self._conn.commit()
+
+            with self._lock:
+                for path in set(known) - seen:
+                    self._conn.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                    self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                    counts["removed"] += 1
+                self._conn.commit()
+
+                self._open_vectors()
+                if self._count - int(self._live.sum()) > max(1024, int(self._live.sum())):
+                    self.compact()
+                self.last_refresh = time.time()
+        return counts
+
+    def _stale(self, interval: Optional[float]) -> bool:
+        return self.last_refresh == 0.0 or (interval is not None and time.time() - self.last_refresh >= interval)
+
+    def refresh_if_stale(self, interval: Optional[float]) -> None:
+        """Refresh if never indexed in this process or the last refresh is older than ``interval`` seconds.
+
+        The refresh runs in a background thread and searches use the current
+        index until it is done. Only an index with nothing in it yet is built
+        before returning. A failed background refresh is kept in
+        ``last_refresh_error`` and retried on the next call.
+        """
+        if not self._stale(interval):
+            return
+        if not self._count:
+            with self._refresh_lock:
+                if self._stale(interval):
+                    self.refresh()
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name="dr-agent-corpus-refresh", daemon=True).start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+            self.last_refresh_error = None
+        except Exception as e:
+            self.last_refresh_error = e
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def compact(self) -> None:
+        """ Rewrite the vector file without tombstoned rows """
+        with self._lock:
+            rows = [row for (row,) in self._conn.execute("SELECT row FROM chunks ORDER BY row")]
+            tmp_path = self._vectors_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(rows), self.block_rows):
+                    f.write(np.ascontiguousarray(self._vectors[rows[start:start + self.block_rows]]).tobytes())
+            # Rows only move down, in order, so renumbering never collides
+            self._conn.executemany("UPDATE chunks SET row = ? WHERE row = ?", list(enumerate(rows)))
+            # Row numbers change: searches that scored the old rows must start over
+            self._generation += 1
+            self._vectors = None
+            os.replace(tmp_path, self._vectors_path)
+            self._count = len(rows)
+            self._set_meta(dim=self._dim, count=self._count, **self._identity())
+            self._conn.commit()
+            self._open_vectors()
+
+    # ---------------- Search ----------------
+    def search(self, query: str, top_k: int = 6) -> list[Document]:
+        """Context documents for the ``top_k`` chunks most similar to ``query``.
+
+        Hits from the same file page are merged into one document (chunks in
+        reading order), scored by its best chunk and ranked by that score.
+        """
+        q = self._embed_query(query)
+        while True:
+            with self._lock:
+                vectors, live, generation = self._vectors, self._live, self._generation
+            if vectors is None or not live.any():
+                return []
+            hits = self._top_rows(q, vectors, live, top_k)
+            if not hits:
+                return []
+            with self._lock:
+                if self._generation != generation:
+                    # Compacted since the scan: the rows now belong to other chunks
+                    continue
+                placeholders = ",".join("?" * len(hits))
+                rows = self._conn.execute(
+                    f"SELECT row, path, page, chunk, content FROM chunks WHERE row IN ({placeholders}) ORDER BY path, page, chunk",
+                    list(hits),
+                ).fetchall()
+            break
+
+        pages: dict[tuple[str, str], dict] = {}
+        for row, path, page, _, content in rows:
+            entry = pages.setdefault((path, page), {"texts": [], "score": -np.inf})
+            entry["texts"].append(content)
+            entry["score"] = max(entry["score"], hits[row])
+        ranked = sorted(pages.items(), key=lambda item: item[1]["score"], reverse=True)
+        return [
+            Document(path, "\n\n".join(entry["texts"]), "local", page=page, title=Path(path).name, score=entry["score"])
+            for (path, page), entry in ranked
+        ]
+
+    def _top_rows(self, q: np.ndarray, vectors: np.ndarray, live: np.ndarray, top_k: int) -> dict[int, float]:
+        """ Scores of the ``top_k`` live rows most similar to ``q``, by row """
+        # `_live` and `_vectors` are replaced together, so they have the same length
+        count = len(live)
+        best_scores, best_rows = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        for start in range(0, count, self.block_rows):
+            scores = vectors[start:start + self.block_rows] @ q
+            scores[~live[start:start + self.block_rows]] = -np.inf
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+        order = np.argsort(-best_scores, kind="stable")[:top_k]
+        return {int(best_rows[i]): float(best_scores[i]) for i in order if np.isfinite(best_scores[i])}
+
+    def stats(self) -> dict:
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            live = int(self._live.sum())
+            return {
+                "files": files,
+                "chunks": live,
+                "tombstoned": self._count - live,
+                "dim": self._dim,
+                "index_bytes": self._vectors_path.stat().st_size if self._vectors_path.exists() else 0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._conn.close()
+
+
+_corpora: dict[tuple, LocalCorpus] = {}
+_corpora_lock = threading.Lock()
+
+
+def get_corpus(configuration: Configuration) -> Optional[LocalCorpus]:
+    """Return the process-wide corpus for ``local_corpus_path``, or None when no corpus is configured.
+
+    An empty index is built by the first call. Otherwise changed files are
+    re-scanned in the background, at most every
+    ``local_corpus_refresh_seconds``, while searches use the current index.
+    """
+    if not configuration.local_corpus_path:
+        return None
+    key = (
+        configuration.local_corpus_path,
+        configuration.local_corpus_index_path,
+        configuration.local_corpus_embeddings,
+        configuration.chunk_tokens,
+    )
+    with _corpora_lock:
+        corpus = _corpora.get(key)
+        if corpus is None:
+            corpus = _corpora[key] = LocalCorpus(
+                configuration.local_corpus_path,
+                configuration.local_corpus_index_path,
+                embeddings=load_embeddings(configuration.local_corpus_embeddings),
+                chunk_tokens=configuration.chunk_tokens,
+            )
+    corpus.refresh_if_stale(configuration.local_corpus_refresh_seconds)
+    return corpus
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index (or re-index) a local document corpus")
+    parser.add_argument("root", help="Directory of Markdown/text/PDF files")
+    parser.add_argument("--index", help=f"Index directory (default: <root>/{INDEX_DIRNAME})")
+    parser.add_argument("--embeddings", default="hashing", help="'hashing' or a provider/model-name embedding model")
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--query", help="Run a test query after indexing")
+    args = parser.parse_args()
+
+    corpus = LocalCorpus(args.root, args.index, load_embeddings(args.embeddings), chunk_tokens=args.chunk_tokens)
+    start = time.perf_counter()
+    changes = corpus.refresh()
+    print(json.dumps({**changes, **corpus.stats(), "seconds": round(time.perf_counter() - start, 3)}, indent=2))
+    if args.query:
+        for doc in corpus.search(args.query):
+            print(f"{doc.score:.3f}  {doc.source} {doc.page}".rstrip())
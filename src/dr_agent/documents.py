@@ -0,0 +1,157 @@
+"""Structured retrieval documents and the bounded, deduplicated context store."""
+
+from dataclasses import dataclass, replace
+from typing import Optional, Union
+from urllib.parse import urlsplit, urlunsplit
+
+from pydantic import BaseModel, Field
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 8000
+
+
+def count_tokens(text: str) -> int:
+    """ Cheap token estimate (~4 characters per token), good enough for budgeting """
+    return len(text) // 4 + 1
+
+
+@dataclass(slots=True)
+class Document:
+    """A retrieved document, or a chunk of one, as carried through the graph state.
+
+    ``source`` is the URL or file path, ``retriever`` the backend that found it
+    ("web", "wikipedia" or "local"). ``tokens`` is estimated once, when the
+    document is built; ``score`` ranks it for eviction (higher is kept longer).
+    Chunks also carry their ``chunk`` index and BM25 ``relevance``.
+    """
+
+    source: str
+    content: str
+    retriever: str
+    page: str = ""
+    title: str = ""
+    score: float = 1.0
+    tokens: int = -1
+    chunk: Optional[int] = None
+    relevance: Optional[float] = None
+
+    def __post_init__(self):
+        if self.tokens < 0:
+            self.tokens = count_tokens(self.content)
+
+    def render(self) -> str:
+        """ Prompt text for this document, with the source header the answer prompt cites from """
+        if self.retriever == "web":
+            header = f'<Document href="{self.source}"/>'
+        else:
+            header = f'<Document source="{self.source}" page="{self.page}"/>'
+        return f"{header}\n{self.content}\n</Document>"
+
+
+def normalize_url(url: str) -> str:
+    """ Canonical form of a URL for deduplication: lower-case scheme/host, no fragment or trailing slash """
+    parts = urlsplit(url.strip())
+    if not parts.scheme:
+        return url.strip()
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def document_key(doc: Document) -> tuple[str, str]:
+    return normalize_url(doc.source), doc.page
+
+
+def web_documents(search_docs: dict) -> list[Document]:
+    """ Tavily results as context documents, ranked by result position """
+    return [
+        Document(doc["url"], doc["content"], "web", title=doc.get("title", ""), score=1.0 / (rank + 1))
+        for rank, doc in enumerate(search_docs["results"])
+    ]
+
+
+def wikipedia_documents(search_docs: list[dict]) -> list[Document]:
+    """ Wikipedia pages (as produced by `documents_to_json`) as context documents """
+    return [
+        Document(
+            doc["metadata"]["source"],
+            doc["page_content"],
+            "wikipedia",
+            page=str(doc["metadata"].get("page", "")),
+            title=doc["metadata"].get("title", ""),
+            score=1.0 / (rank + 1),
+        )
+        for rank, doc in enumerate(search_docs)
+    ]
+
+
+def render_documents(documents: list[Document]) -> str:
+    """ Prompt text for a list of documents or chunks, in the given order; built once per prompt """
+    return "\n\n---\n\n".join(doc.render() for doc in documents)
+
+
+class DocumentStore(BaseModel):
+    """Retrieved documents for one interview, unique by source and within a token budget."""
+
+    token_budget: int = Field(
+        default=DEFAULT_CONTEXT_TOKEN_BUDGET,
+        description="Maximum estimated tokens kept across all documents",
+    )
+    documents: list[Document] = Field(
+        default_factory=list,
+        description="Documents in insertion order",
+    )
+
+    @property
+    def tokens(self) -> int:
+        return sum(doc.tokens for doc in self.documents)
+
+    def render(self) -> str:
+        """ Prompt text for the whole store, in insertion order """
+        return render_documents(self.documents)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+
+def _evict(documents: list[Document], token_budget: int) -> list[Document]:
+    total = sum(doc.tokens for doc in documents)
+    if total <= token_budget:
+        return documents
+    # Drop the lowest-scored documents first; among equals, the oldest goes first
+    order = sorted(range(len(documents)), key=lambda i: (documents[i].score, i))
+    dropped = set()
+    for i in order:
+        if total <= token_budget:
+            break
+        dropped.add(i)
+        total -= documents[i].tokens
+    return [doc for i, doc in enumerate(documents) if i not in dropped]
+
+
+def merge_context(left: DocumentStore, right: Union[DocumentStore, list[Document]]) -> DocumentStore:
+    """Reducer for `InterviewState.context`.
+
+    ``right`` is either a list of new documents from a retriever or a whole
+    store (used to seed the interview with its token budget). Documents are
+    deduplicated by source/page, keeping the first copy with the best score,
+    then the lowest-ranked ones are evicted until the store fits its budget.
+    """
+    if left is None:
+        left = DocumentStore()
+    if isinstance(right, DocumentStore):
+        token_budget, incoming = right.token_budget, right.documents
+    else:
+        token_budget, incoming = left.token_budget, right
+
+    documents = list(left.documents)
+    positions = {document_key(doc): i for i, doc in enumerate(documents)}
+    for doc in incoming:
+        key = document_key(doc)
+        if key in positions:
+            existing = documents[positions[key]]
+            if doc.score > existing.score:
+                documents[positions[key]] = replace(existing, score=doc.score)
+            continue
+        positions[key] = len(documents)
+        documents.append(doc)
+
+    return DocumentStore(token_budget=token_budget, documents=_evict(documents, token_budget))
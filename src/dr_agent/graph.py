@@ -1,10 +1,10 @@
 """Graph definition for the deep research agent."""
 
 from langgraph.graph import START, END, StateGraph
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.constants import Send
 from langgraph.types import Command
-from typing import Literal
+from typing import Literal, Optional
+from langchain_core.runnables import RunnableConfig
 
 from dr_agent.state import (
     InterviewOutputState,
@@ -13,92 +13,112 @@ from dr_agent.state import (
     ResearchGraphInputState,
     ResearchGraphOutputState,
 )
-from dr_agent.nodes import (
-    # Analyst creation
-    create_analysts,
-    confirm_analysts,
-    initiate_all_interviews,
-    
-    # Interview nodes
-    generate_question,
-    search_web,
-    search_wikipedia,
-    generate_answer,
-    save_interview,
-    route_messages,
-    write_section,
-    
-    # Report writing nodes
-    write_report,
-    write_introduction,
-    write_conclusion,
-    finalize_report,
-)
-
-
-def create_interview_graph():
-    """Create the interview subgraph for conducting individual analyst interviews."""
+from dr_agent import async_nodes, nodes
+from dr_agent.checkpointer import checkpointer_from_config
+from dr_agent.telemetry import telemetry_from_config
+
+
+# Interview graph nodes, by node name, with the name of the function implementing each
+INTERVIEW_NODES = {
+    "ask_question": "generate_question",
+    "generate_search_query": "generate_search_query",
+    "search_web": "search_web",
+    "search_wikipedia": "search_wikipedia",
+    "search_local_corpus": "search_local_corpus",
+    "select_context": "select_context",
+    "answer_question": "generate_answer",
+    "save_interview": "save_interview",
+    "write_section": "write_section",
+    "draft_section": "draft_section",
+}
+
+
+def _node_impls(async_mode: bool):
+    """Pick the sync or async implementation of every node."""
+    return async_nodes if async_mode else nodes
+
+
+def create_interview_graph(async_mode: bool = False):
+    """Create the interview subgraph for conducting individual analyst interviews.
+
+    With ``async_mode=True`` every node is a coroutine, so ``astream`` runs the
+    search branches of all interviews concurrently on one event loop.
+    """
+    n = _node_impls(async_mode)
     interview_builder = StateGraph(InterviewState, output_schema=InterviewOutputState)
     
     # Add nodes
-    interview_builder.add_node("ask_question", generate_question)
-    interview_builder.add_node("search_web", search_web)
-    interview_builder.add_node("search_wikipedia", search_wikipedia)
-    interview_builder.add_node("answer_question", generate_answer)
-    interview_builder.add_node("save_interview", save_interview)
-    interview_builder.add_node("write_section", write_section)
+    for name, impl in INTERVIEW_NODES.items():
+        interview_builder.add_node(name, getattr(n, impl))
 
     # Add edges
     interview_builder.add_edge(START, "ask_question")
     
-    # Parallel search paths
-    interview_builder.add_edge("ask_question", "search_web")
-    interview_builder.add_edge("ask_question", "search_wikipedia")
+    # Queries are written once per turn and shared by the parallel search paths
+    interview_builder.add_edge("ask_question", "generate_search_query")
+    interview_builder.add_edge("generate_search_query", "search_web")
+    interview_builder.add_edge("generate_search_query", "search_wikipedia")
+    interview_builder.add_edge("generate_search_query", "search_local_corpus")
     
-    # Both search paths lead to answer generation
-    interview_builder.add_edge("search_web", "answer_question")
-    interview_builder.add_edge("search_wikipedia", "answer_question")
+    # All search paths feed chunk selection, then answer generation
+    interview_builder.add_edge("search_web", "select_context")
+    interview_builder.add_edge("search_wikipedia", "select_context")
+    interview_builder.add_edge("search_local_corpus", "select_context")
+    interview_builder.add_edge("select_context", "answer_question")
     
     # Conditional routing after answer
     interview_builder.add_conditional_edges(
         "answer_question",
-        route_messages,
+        n.route_messages,
         ["ask_question", "save_interview"],
     )
     
     # Final steps
     interview_builder.add_edge("save_interview", "write_section")
-    interview_builder.add_edge("write_section", END)
+    # Pipelined synthesis drafts this section's part of the report right away
+    interview_builder.add_conditional_edges("write_section", n.route_section, ["draft_section", END])
+    interview_builder.add_edge("draft_section", END)
     
     return interview_builder.compile()
 
 
-def create_research_graph():
-    """Create the main research graph that orchestrates the entire research process."""
+def create_research_graph(async_mode: bool = False, config: Optional[RunnableConfig] = None):
+    """Create the main research graph that orchestrates the entire research process.
+
+    Pass ``async_mode=True`` for the async node implementations; the compiled
+    graph must then be driven with ``ainvoke``/``astream``. The checkpointer is
+    built from the ``checkpointer_*`` fields of ``config`` (in-memory by default),
+    and ``telemetry_enabled`` attaches the process-wide `NodeTelemetry` handler.
+    """
+    n = _node_impls(async_mode)
     builder = StateGraph(
         ResearchGraphState, 
         input_schema=ResearchGraphInputState, 
         output_schema=ResearchGraphOutputState)
     
     # Add nodes
-    builder.add_node("create_analysts", create_analysts)
-    builder.add_node("confirm_analysts", confirm_analysts) 
-    builder.add_node("initiate_all_interviews", initiate_all_interviews)
-    builder.add_node("conduct_interview", create_interview_graph())
-    builder.add_node("write_report", write_report)
-    builder.add_node("write_introduction", write_introduction)
-    builder.add_node("write_conclusion", write_conclusion)
-    builder.add_node("finalize_report", finalize_report)
+    builder.add_node("create_analysts", n.create_analysts)
+    builder.add_node("confirm_analysts", n.confirm_analysts) 
+    builder.add_node("initiate_all_interviews", n.initiate_all_interviews)
+    builder.add_node("conduct_interview", create_interview_graph(async_mode))
+    builder.add_node("digest_sections", n.digest_sections)
+    builder.add_node("write_report", n.write_report)
+    builder.add_node("write_introduction", n.write_introduction)
+    builder.add_node("write_conclusion", n.write_conclusion)
+    builder.add_node("finalize_report", n.finalize_report)
 
     # Add edges
     builder.add_edge(START, "create_analysts")
     builder.add_edge("create_analysts", "confirm_analysts")
     builder.add_edge("confirm_analysts", "initiate_all_interviews")
     
-    # After interviews, write report components in parallel
-    builder.add_edge("conduct_interview", "write_report")
-    builder.add_edge("conduct_interview", "write_introduction")
-    builder.add_edge("conduct_interview", "write_conclusion")
+    # After interviews, digest the sections if they are too large to send whole
+    builder.add_edge("conduct_interview", "digest_sections")
+
+    # Then write report components in parallel
+    builder.add_edge("digest_sections", "write_report")
+    builder.add_edge("digest_sections", "write_introduction")
+    builder.add_edge("digest_sections", "write_conclusion")
     
     # All report components must complete before finalization
     builder.add_edge("write_conclusion", "finalize_report")
@@ -106,17 +126,27 @@ def create_research_graph():
     builder.add_edge("write_introduction", "finalize_report")
     builder.add_edge("finalize_report", END)
 
-    # Compile with memory and interrupts
-    memory = MemorySaver()
+    # Compile with the configured checkpointer and interrupts
+    checkpointer = checkpointer_from_config(config, async_mode=async_mode)
     graph = builder.compile(
-        checkpointer=memory, # interrupt_before=['initiate_all_interviews'], 
+        checkpointer=checkpointer, # interrupt_before=['initiate_all_interviews'], 
     )
+
+    # Per-node timing/token/cost collection, when enabled
+    telemetry = telemetry_from_config(config)
+    if telemetry is not None:
+        graph = graph.with_config(callbacks=[telemetry])
     
     return graph
 
 
-# Create the main graph instance
-research_graph = create_research_graph()
+def __getattr__(name: str):
+    # The default `research_graph` is compiled on first access, not on import
+    if name == "research_graph":
+        global research_graph
+        research_graph = create_research_graph()
+        return research_graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # For backward compatibility, also expose the individual functions
 def interview_graph():
@@ -0,0 +1,224 @@
+"""Opt-in response cache for the chat models returned by `get_llm`.
+
+Plugs into LangChain's model-level cache hook, so it sees the rendered
+messages plus an ``llm_string`` describing the model name, parameters and any
+bound structured-output schema. Both plain ``invoke`` and
+``with_structured_output`` calls are therefore cached without node changes.
+
+The similarity tier compares only what varies between prompts: the static
+text of the templates in `dr_agent.prompts` is cut out before embedding, and a
+prompt is only compared with prompts built from the same templates.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.embeddings import Embeddings
+
+from dr_agent import prompts
+from dr_agent.configuration import Configuration
+from dr_agent.embeddings import HashingEmbeddings
+
+_PLACEHOLDER = re.compile(r"\{\w+\}")
+# Shorter template text is left in place; it could just as well be part of a filled-in value
+_MIN_SEGMENT_CHARS = 12
+
+
+def _template_segments() -> list[tuple[str, str]]:
+    """ (template name, static text between placeholders) of every prompt template, longest first """
+    segments = [
+        (name, segment)
+        for name, template in vars(prompts).items()
+        if name.isupper() and isinstance(template, str)
+        for segment in _PLACEHOLDER.split(template)
+        if len(segment.strip()) >= _MIN_SEGMENT_CHARS
+    ]
+    return sorted(segments, key=lambda item: -len(item[1]))
+
+
+_TEMPLATE_SEGMENTS = _template_segments()
+
+
+def _prompt_text(prompt: str) -> tuple[str, str]:
+    """ The templates a serialized chat prompt was built from, and its message text without their static parts """
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        messages = None
+    if isinstance(messages, list):
+        parts = []
+        for message in messages:
+            content = message.get("kwargs", {}).get("content", "") if isinstance(message, dict) else ""
+            parts.append(content if isinstance(content, str) else json.dumps(content))
+        text = "\n".join(parts)
+    else:
+        text = prompt
+    templates = set()
+    for name, segment in _TEMPLATE_SEGMENTS:
+        if segment in text:
+            templates.add(name)
+            text = text.replace(segment, "\n")
+    return ",".join(sorted(templates)), text
+
+
+class ResponseCache(BaseCache):
+    """Bounded LRU cache of model generations.
+
+    The exact tier matches on a hash of the rendered prompt plus ``llm_string``.
+    When ``embeddings`` is given, a similarity tier backed by an in-memory NumPy
+    flat index also returns the generation of the closest cached prompt for the
+    same ``llm_string`` and prompt templates whose cosine similarity, over the
+    filled-in values only, reaches ``similarity_threshold``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        embeddings: Optional[Embeddings] = None,
+        similarity_threshold: float = 0.97,
+    ):
+        self.max_entries = max_entries
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        # Each entry keeps its similarity scope: the llm_string and the prompt's templates
+        self._entries: OrderedDict[str, tuple[str, RETURN_VAL_TYPE]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0}
+        # Similarity index: one row per cached entry, slots are recycled on eviction
+        self._vectors: Optional[np.ndarray] = None
+        self._slot_keys: list[Optional[str]] = []
+        self._key_slots: dict[str, int] = {}
+        self._free_slots: list[int] = []
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _scope(templates: str, llm_string: str) -> str:
+        return f"{llm_string}\x00{templates}"
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["exact_hits"] += 1
+                return entry[1]
+            if self.embeddings is None or not self._key_slots:
+                self._counters["misses"] += 1
+                return None
+
+        templates, text = _prompt_text(prompt)
+        scope = self._scope(templates, llm_string)
+        vector = self._embed(text)
+        with self._lock:
+            if not self._key_slots:
+                self._counters["misses"] += 1
+                return None
+            scores = self._vectors @ vector
+            for slot in np.argsort(-scores):
+                if scores[slot] < self.similarity_threshold:
+                    break
+                match = self._slot_keys[slot]
+                if match is not None and self._entries[match][0] == scope:
+                    self._entries.move_to_end(match)
+                    self._counters["similar_hits"] += 1
+                    return self._entries[match][1]
+            self._counters["misses"] += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        templates, text = _prompt_text(prompt)
+        vector = self._embed(text) if self.embeddings is not None else None
+        with self._lock:
+            self._entries[key] = (self._scope(templates, llm_string), return_val)
+            self._entries.move_to_end(key)
+            if vector is not None and key not in self._key_slots:
+                self._index(key, vector)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unindex(evicted)
+                self._counters["evictions"] += 1
+
+    def _index(self, key: str, vector: np.ndarray) -> None:
+        if self._vectors is None:
+            self._vectors = np.zeros((0, vector.shape[0]), dtype=np.float32)
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = len(self._slot_keys)
+            self._slot_keys.append(None)
+            self._vectors = np.vstack([self._vectors, np.zeros_like(vector)[None, :]])
+        self._vectors[slot] = vector
+        self._slot_keys[slot] = key
+        self._key_slots[key] = slot
+
+    def _unindex(self, key: str) -> None:
+        slot = self._key_slots.pop(key, None)
+        if slot is not None:
+            self._vectors[slot] = 0.0
+            self._slot_keys[slot] = None
+            self._free_slots.append(slot)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._vectors = None
+            self._slot_keys = []
+            self._key_slots = {}
+            self._free_slots = []
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._counters["exact_hits"] + self._counters["similar_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hits": hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+_caches: dict[tuple[int, Optional[float]], ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(configuration: Configuration) -> Optional[ResponseCache]:
+    """ Return the process-wide response cache for this configuration, or None when disabled """
+    if not configuration.llm_cache_enabled:
+        return None
+    threshold = configuration.llm_cache_similarity_threshold
+    key = (configuration.llm_cache_max_entries, threshold)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = ResponseCache(
+                max_entries=configuration.llm_cache_max_entries,
+                embeddings=HashingEmbeddings() if threshold is not None else None,
+                similarity_threshold=threshold if threshold is not None else 1.0,
+            )
+        return cache
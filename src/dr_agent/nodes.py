@@ -1,4 +1,5 @@
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, ensure_config
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from pydantic import BaseModel, Field
 from langgraph.graph import START, END, StateGraph, MessagesState
 from dr_agent.state import (
@@ -9,48 +10,90 @@ from dr_agent.state import (
     Perspectives,
 )
 from dr_agent.configuration import Configuration
-from langchain_openai import ChatOpenAI
+from dr_agent.clients import llm_clients
+from dr_agent.llm_cache import get_response_cache
+from dr_agent.documents import Document, DocumentStore, render_documents, web_documents, wikipedia_documents
+from dr_agent.retrieval import (
+    chunk_documents,
+    chunk_key,
+    context_novelty,
+    distinct_queries,
+    reciprocal_rank_fusion,
+    select_chunks,
+)
+from dr_agent.streaming import assemble_report
+from dr_agent.synthesis import (
+    batch_sections,
+    join_sections,
+    merge_drafts,
+    needs_digest,
+    ordered_drafts,
+    pipelined,
+    report_context,
+    section_digest,
+)
+from dr_agent.search import documents_to_json, get_tavily_search, wikipedia_search
+from dr_agent.search_cache import get_search_cache
+from dr_agent.section_store import get_section_store, section_key
+from dr_agent.prewarm import get_prewarmer, warm_key
+from dr_agent.scheduler import run_search
+from dr_agent.corpus import get_corpus
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from langgraph.constants import Send
 from langgraph.types import Command
-from langchain_community.document_loaders.wikipedia import WikipediaLoader
-from langchain_tavily import TavilySearch
 from langchain_core.messages import get_buffer_string
-from typing import Literal, Optional
+from typing import Callable, Literal, Optional
 from dr_agent import prompts
 from langgraph.types import interrupt
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
-def get_llm(config: Optional[RunnableConfig] = None):
+def get_llm(config: Optional[RunnableConfig] = None, node: Optional[str] = None):
+    """ Chat model of ``node``, by default the graph node running with ``config`` (see `Configuration.node_models`) """
     configuration = Configuration.from_runnable_config(config)
-    # Extract just the model name from the "provider/model-name" format
-    model_parts = configuration.model.split('/')
-    model_name = model_parts[-1] if len(model_parts) > 1 else configuration.model
-    llm = ChatOpenAI(model=model_name)
-    return llm
+    if node is None:
+        node = (ensure_config(config).get("metadata") or {}).get("langgraph_node")
+    # Clients are pooled per "provider/model-name" and share one HTTP connection pool
+    return llm_clients.get(configuration.model_for(node), cache=get_response_cache(configuration))
 
 # ---------------- Generate Analysts ----------------
+def current_analysts(state: ResearchGraphState) -> list[Analyst]:
+    """ The roster already in state: the one being revised, or one passed in with the input """
+    return [Analyst.model_validate(analyst) for analyst in state.get("analysts") or []]
+
+def analyst_instructions(state: ResearchGraphState, analysts: list[Analyst]) -> str:
+    """ Analyst generation prompt; a current roster is revised so that unchanged analysts keep their identity """
+    system_message = prompts.ANALYST_INSTRUCTIONS.format(
+        topic=state["topic"],
+        human_analyst_feedback=state.get('human_analyst_feedback', ''),
+        max_analysts=state["max_analysts"],
+    )
+    if analysts:
+        system_message += prompts.ANALYST_REVISION_INSTRUCTIONS.format(
+            analysts="\n".join(analyst.persona for analyst in analysts)
+        )
+    return system_message
+
+def prewarm_interviews(state: ResearchGraphState, analysts: list[Analyst], config: Optional[RunnableConfig]) -> None:
+    """ Start the proposed analysts' first turns in the background, to run while the roster is reviewed """
+    prewarmer = get_prewarmer(Configuration.from_runnable_config(config))
+    if prewarmer is not None:
+        prewarmer.start(state["topic"], analysts, config or {})
+
 def create_analysts(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
-    """ Create analysts """
-    topic = state["topic"]
-    max_analysts = state["max_analysts"]
-    human_analyst_feedback = state.get('human_analyst_feedback', '')
+    """ Create analysts, or revise the current ones with the feedback """
+    analysts = current_analysts(state)
+    if analysts and not state.get("human_analyst_feedback"):
+        # A roster passed in without feedback is used as is
+        prewarm_interviews(state, analysts, config)
+        return {"analysts": analysts}
     
     llm = get_llm(config)
     structured_llm = llm.with_structured_output(Perspectives)
-    
-    system_message = prompts.ANALYST_INSTRUCTIONS.format(
-        topic=topic, 
-        human_analyst_feedback=human_analyst_feedback,
-        max_analysts=max_analysts,
-    )
+    system_message = analyst_instructions(state, analysts)
     
     analysts = structured_llm.invoke(
-        [SystemMessage(content=system_message)] + [HumanMessage(content="Generate the set of analysts.")]
+        [SystemMessage(content=system_message)] + [HumanMessage(content=prompts.ANALYSTS_REQUEST)]
     )
+    prewarm_interviews(state, analysts.analysts, config)
     return {"analysts": analysts.analysts}
 
 def confirm_analysts(state: ResearchGraphState):
@@ -62,97 +105,222 @@ def confirm_analysts(state: ResearchGraphState):
         "generated_analysts": analysts
     })
 
-def initiate_all_interviews(state: ResearchGraphState) -> Command[Literal["create_analysts", "conduct_interview"]]:
+def opening_message(topic: str) -> HumanMessage:
+    """ First message of every interview """
+    return HumanMessage(content=prompts.INTERVIEW_OPENING.format(topic=topic))
+
+def initiate_all_interviews(state: ResearchGraphState, config: Optional[RunnableConfig] = None) -> Command[Literal["create_analysts", "conduct_interview", "digest_sections"]]:
     """ This is the "map" step where we run each interview sub-graph using Send API """    
     human_analyst_feedback = state.get("human_analyst_feedback", None)
     if human_analyst_feedback is not None:
         return Command(update={}, goto="create_analysts")
     else:
         topic = state["topic"]
-        sends = [
-            Send(
+        max_num_turns = state.get("max_num_turns", 2)
+        configuration = Configuration.from_runnable_config(config)
+        store = get_section_store(configuration)
+        prewarmer = get_prewarmer(configuration)
+        
+        # Analysts whose section is already stored (unchanged by a roster revision) are not interviewed again
+        sends, reused = [], []
+        for analyst in current_analysts(state):
+            key = section_key(topic, analyst, max_num_turns, configuration)
+            section = store.get(key, configuration.section_store_ttl) if store is not None else None
+            if section is not None:
+                reused.append(section)
+                if prewarmer is not None:
+                    prewarmer.discard(warm_key(topic, analyst, configuration))
+                continue
+            sends.append(Send(
                 "conduct_interview", {
                         "analyst": analyst, 
-                        "messages": [HumanMessage(content=f"So you said you were writing an article on {topic}?")]
+                        "topic": topic,
+                        "messages": [opening_message(topic)],
+                        "context": DocumentStore(token_budget=configuration.context_token_budget),
+                        "max_num_turns": max_num_turns,
+                        "section_key": key,
+                        "warm_key": warm_key(topic, analyst, configuration) if prewarmer is not None else None,
                     }
-                ) for analyst in state["analysts"]
-        ]
+                ))
 
-        return Command(update={"human_analyst_feedback": human_analyst_feedback}, goto=sends)
+        return Command(
+            update={"human_analyst_feedback": human_analyst_feedback, "sections": reused},
+            goto=sends or "digest_sections",
+        )
 
 # ---------------- Conduct Interviews ----------------  
 class SearchQuery(BaseModel):
     search_query: str = Field(None, description="Search Query for retrieval")
 
+class SearchQueries(BaseModel):
+    search_queries: list[str] = Field(
+        description="Diverse search queries for retrieval, most important first"
+    )
+
+def warm_start_update(warm) -> Optional[dict]:
+    """ First-turn update from a speculative warm start: its question, with its queries kept for the search step """
+    if warm is None:
+        return None
+    return {"messages": [warm.question], "warm_queries": warm.search_queries}
+
 def generate_question(state: InterviewState, config: Optional[RunnableConfig] = None):
     """ Node to generate a question """
     
+    # The first question may already have been asked speculatively during analyst review
+    if state.get("warm_key") and not state.get("num_turns"):
+        prewarmer = get_prewarmer(Configuration.from_runnable_config(config))
+        update = warm_start_update(prewarmer.take(state["warm_key"]) if prewarmer is not None else None)
+        if update is not None:
+            return update
+    
     # Get State
     analyst = state["analyst"]
     messages = state["messages"]
     
     llm = get_llm(config)
+    # Static instructions, then the persona, then the append-only interview: a stable prompt prefix
     system_messages = prompts.QUESTION_INSTRUCTIONS.format(goals=analyst.persona)
     question = llm.invoke([SystemMessage(content=system_messages)] + messages)
     
     return {"messages": [question]}
 
-# Initialize TavilySearch after environment variables are loaded
-tavily_search = TavilySearch(max_results=3)
+def search_instructions(configuration: Configuration) -> SystemMessage:
+    return SystemMessage(content=prompts.SEARCH_INSTRUCTIONS.format(num_queries=configuration.search_queries_per_turn))
 
+def search_queries(state: InterviewState, result: SearchQueries, configuration: Configuration) -> list[str]:
+    """ The distinct generated queries, falling back to the analyst's question if there are none """
+    queries = distinct_queries(result.search_queries or [], configuration.search_queries_per_turn)
+    return queries or [state["messages"][-1].content]
 
-# Search query writing
-def search_web(state: InterviewState, config: Optional[RunnableConfig] = None):
-    """ Retrieve docs from web search """
+def generate_search_query(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Write diverse search queries per turn, shared by every retriever """
+    if state.get("warm_queries") and not state.get("num_turns"):
+        return {"search_queries": state["warm_queries"]}
+    configuration = Configuration.from_runnable_config(config)
     llm = get_llm(config)
-    structured_llm = llm.with_structured_output(SearchQuery)
-    search_query = structured_llm.invoke([SystemMessage(content=prompts.SEARCH_INSTRUCTIONS)] + state["messages"])
+    structured_llm = llm.with_structured_output(SearchQueries)
+    result = structured_llm.invoke([search_instructions(configuration)] + state["messages"])
     
-    search_docs = tavily_search.invoke({"query": search_query.search_query})
-    
-    formatted_search_docs = "\n\n---\n\n".join(
-        [
-            f'<Document href="{doc["url"]}"/>\n{doc["content"]}\n</Document>'
-            for doc in search_docs["results"]
-        ]
-    )
+    return {"search_queries": search_queries(state, result, configuration)}
+
+def map_queries(search: Callable[[str], list[Document]], queries: list[str]) -> list[list[Document]]:
+    """ Run ``search`` for every query concurrently; results keep the query order """
+    if len(queries) == 1:
+        return [search(queries[0])]
+    with ContextThreadPoolExecutor(max_workers=len(queries)) as executor:
+        return list(executor.map(search, queries))
+
+# Search query writing
+def search_web(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Retrieve docs from web search, one call per query, fused by rank """
+    configuration = Configuration.from_runnable_config(config)
+    cache = get_search_cache(configuration)
+
+    def search(query: str) -> list[Document]:
+        return web_documents(cache.fetch(
+            "web",
+            query,
+            configuration.search_cache_ttl_web,
+            lambda query: run_search(configuration, "tavily", get_tavily_search().invoke, {"query": query}),
+        ))
     
-    return {"context": [formatted_search_docs]}
+    return {"context": reciprocal_rank_fusion(map_queries(search, state["search_queries"]))}
 
 def search_wikipedia(state: InterviewState, config: Optional[RunnableConfig] = None):
-    """ Retrieve docs from wikipedia """
-    llm = get_llm(config)
-    structured_llm = llm.with_structured_output(SearchQuery)
-    search_query = structured_llm.invoke([SystemMessage(content=prompts.SEARCH_INSTRUCTIONS)] + state["messages"])
+    """ Retrieve docs from wikipedia, one call per query, fused by rank """
+    configuration = Configuration.from_runnable_config(config)
+    cache = get_search_cache(configuration)
+
+    def search(query: str) -> list[Document]:
+        return wikipedia_documents(cache.fetch(
+            "wikipedia",
+            query,
+            configuration.search_cache_ttl_wikipedia,
+            lambda query: documents_to_json(run_search(configuration, "wikipedia", wikipedia_search, query, load_max_docs=2)),
+        ))
     
-    search_docs = WikipediaLoader(
-        query=search_query.search_query,
-        load_max_docs=2,
-    ).load()
+    return {"context": reciprocal_rank_fusion(map_queries(search, state["search_queries"]))}
+
+def search_local_corpus(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Retrieve chunks from the local document corpus, one search per query, fused by rank """
+    configuration = Configuration.from_runnable_config(config)
+    corpus = get_corpus(configuration)
+    if corpus is None:
+        return {"context": []}
+
+    def search(query: str) -> list[Document]:
+        return corpus.search(query, configuration.local_corpus_top_k)
+
+    return {"context": reciprocal_rank_fusion(map_queries(search, state["search_queries"]))}
+
+def used_context(state: InterviewState, configuration: Configuration) -> list[Document]:
+    """ Chunks (whole documents when reranking is off) of the interview context that answers were given """
+    seen_keys = set(state.get("seen_chunks", []))
+    if not seen_keys:
+        return []
+    documents = state["context"].documents
+    if configuration.rerank_enabled:
+        documents = chunk_documents(documents, configuration.chunk_tokens)
+    return [chunk for chunk in documents if chunk_key(chunk) in seen_keys]
+
+def context_update(state: InterviewState, selected: list[Document], configuration: Configuration) -> dict:
+    """ Selected context, its novelty against the chunks used in earlier turns, and the prompt text of the new chunks """
+    seen_keys = set(state.get("seen_chunks", []))
+    seen = used_context(state, configuration)
+    new = [chunk for chunk in selected if chunk_key(chunk) not in seen_keys]
+    return {
+        "selected_context": selected,
+        "novelty": context_novelty(selected, seen, configuration.novelty_similarity),
+        "seen_chunks": list(dict.fromkeys(map(chunk_key, new))),
+        "turn_context": [render_documents(new)],
+    }
+
+def select_context(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Keep only the context chunks most relevant to the current question """
+    configuration = Configuration.from_runnable_config(config)
+    documents = state["context"].documents
+    if not configuration.rerank_enabled:
+        return context_update(state, documents, configuration)
     
-    # Format
-    formatted_search_docs = "\n\n---\n\n".join(
-        [
-            f'<Document source="{doc.metadata["source"]}" page="{doc.metadata.get("page", "")}"/>\n{doc.page_content}\n</Document>'
-            for doc in search_docs
-        ]
+    query = "\n".join([state["messages"][-1].content, *state.get("search_queries", [])])
+    chunks = select_chunks(
+        documents,
+        query,
+        top_k=configuration.rerank_top_k,
+        token_budget=configuration.rerank_token_budget,
+        chunk_tokens=configuration.chunk_tokens,
     )
+    return context_update(state, chunks, configuration)
+
+def answer_messages(state: InterviewState) -> list:
+    """Answer prompt in stable-prefix order, so every turn extends the previous turn's prompt.
+
+    Static instructions, then the persona, then the interview with each
+    turn's new context chunks placed right after its question. Chunks already
+    shown in an earlier turn are not repeated.
+    """
+    blocks = iter(state.get("turn_context", []))
     
-    return {"context": [formatted_search_docs]}
+    def context_message() -> HumanMessage:
+        block = next(blocks, "")
+        return HumanMessage(content=prompts.ANSWER_CONTEXT.format(context=block) if block else prompts.ANSWER_NO_NEW_CONTEXT)
+    
+    messages = [SystemMessage(content=prompts.ANSWER_INSTRUCTIONS.format(goals=state["analyst"].persona))]
+    for message in state["messages"]:
+        if isinstance(message, AIMessage) and message.name == "expert":
+            messages.append(context_message())
+        messages.append(message)
+    messages.append(context_message())
+    return messages
 
 def generate_answer(state: InterviewState, config: Optional[RunnableConfig] = None):
     """ Node to answer a question """
     
-    analyst = state["analyst"]
-    context = state["context"]
-    messages = state["messages"]
-    
     llm = get_llm(config)
-    system_messages = prompts.ANSWER_INSTRUCTIONS.format(goals=analyst.persona, context=context)
-    answer = llm.invoke([SystemMessage(content=system_messages)] + messages)
+    answer = llm.invoke(answer_messages(state))
     
     answer.name = "expert"
-    return {"messages": [answer]}
+    return {"messages": [answer], "num_turns": state.get("num_turns", 0) + 1}
 
 def save_interview(state: InterviewState):
     """ Save interviews """
@@ -162,95 +330,144 @@ def save_interview(state: InterviewState):
     
     return {"interview": interview}
 
-def route_messages(state: InterviewState, name: str = "expert"):
-    """ Route between question and answer """
-    
-    messages = state["messages"]
-    max_num_turns = state.get("max_num_turns", 2)
+def route_messages(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Route between question and answer: stop at max_num_turns, on the analyst's sign-off, or once turns stop finding new context """
+    configuration = Configuration.from_runnable_config(config)
     
-    num_responses = len(
-        [m for m in messages if isinstance(m, AIMessage) and m.name == name]
-    )
+    if state.get("num_turns", 0) >= state.get("max_num_turns", 2):
+        return "save_interview"
     
-    if num_responses >= max_num_turns:
+    last_question = state["messages"][-2]
+    if "Thank you so much for your help" in last_question.content:
         return "save_interview"
     
-    last_messages = messages[-2]
-    if "Thank you so much for your help" in last_messages:
+    threshold = configuration.novelty_threshold
+    if threshold is not None and state.get("novelty", 1.0) < threshold:
         return "save_interview"
-    else:
-        return "ask_question"
+    return "ask_question"
+
+def interview_digest(state: InterviewState, configuration: Configuration) -> str:
+    """ Cited facts from the expert's answers plus the context they drew on, within section_digest_tokens """
+    answers = [m.content for m in state["messages"] if isinstance(m, AIMessage) and m.name == "expert"]
+    used = used_context(state, configuration)
+    # Fall back to the whole context when none of the used chunks survived eviction
+    excerpts = used or state["context"].documents
+    if not used or not configuration.rerank_enabled:
+        excerpts = chunk_documents(excerpts, configuration.chunk_tokens)
+    return section_digest(answers, excerpts, state["analyst"].description, configuration.section_digest_tokens)
+
+def store_section(state: InterviewState, section: str, configuration: Configuration) -> None:
+    """ Keep a finished section for reuse by later runs with the same analyst and topic """
+    store = get_section_store(configuration)
+    if store is not None and state.get("section_key"):
+        store.put(state["section_key"], section)
 
 def write_section(state: InterviewState, config: Optional[RunnableConfig] = None):
-    """ Node to answer a question """
-    # Get state
-    interview = state["interview"]
-    context = state["context"]
+    """ Node to write a report section from a compact digest of the interview """
+    configuration = Configuration.from_runnable_config(config)
     analyst = state["analyst"]
     
     llm = get_llm(config)
     system_message = prompts.SECTION_WRITER_INSTRUCTIONS.format(focus=analyst.description)
-    section = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Use this source to write your section: {context}")]) 
+    digest = interview_digest(state, configuration)
+    section = llm.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=prompts.SECTION_REQUEST.format(digest=digest))]) 
+    store_section(state, section.content, configuration)
     
     return {"sections": [section.content]}
 
+def route_section(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Pipelined synthesis drafts the section into the report body while other interviews run """
+    if pipelined(Configuration.from_runnable_config(config).synthesis_mode):
+        return "draft_section"
+    return END
+
+def draft_messages(topic: str, section: str) -> list:
+    return [
+        SystemMessage(content=prompts.SECTION_DRAFT_INSTRUCTIONS.format(topic=topic)),
+        HumanMessage(content=prompts.SECTION_DRAFT_REQUEST.format(section=section)),
+    ]
+
+def undrafted_sections(state: ResearchGraphState) -> list[str]:
+    """ Sections without a pipelined draft, e.g. ones reused from the section store """
+    drafted = {draft["section"] for draft in state.get("drafts") or []}
+    return [section for section in state["sections"] if section not in drafted]
+
+def draft_section(state: InterviewState, config: Optional[RunnableConfig] = None):
+    """ Node to draft this interview's part of the report body as soon as its section is written """
+    section = state["sections"][-1]
+    draft = get_llm(config).invoke(draft_messages(state["topic"], section))
+    return {"drafts": [{"section": section, "draft": draft.content}]}
+
 # ---------------- Finalize Report ----------------
-def write_report(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
+def digest_sections(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
+    """ Map-reduce the sections into a compact digest when they are too large to send whole """
+    configuration = Configuration.from_runnable_config(config)
     sections = state["sections"]
+    if pipelined(configuration.synthesis_mode):
+        # The drafts are already condensed; only sections that skipped the interview still need one
+        missing = undrafted_sections(state)
+        drafts = get_llm(config).batch([draft_messages(state["topic"], section) for section in missing]) if missing else []
+        return {"digest": "", "drafts": [{"section": s, "draft": d.content} for s, d in zip(missing, drafts)]}
+    if not needs_digest(sections, configuration.synthesis_token_threshold):
+        return {"digest": ""}
+    
+    llm = get_llm(config)
+    instructions = prompts.SECTION_DIGEST_INSTRUCTIONS.format(topic=state["topic"])
+    parts = sections
+    for _ in range(configuration.synthesis_max_rounds):
+        batches = batch_sections(parts, configuration.synthesis_batch_tokens)
+        # Map: digest every batch in parallel
+        digests = llm.batch(
+            [[SystemMessage(content=instructions), HumanMessage(content=join_sections(batch))] for batch in batches]
+        )
+        parts = [d.content for d in digests]
+        # Reduce: stop once the combined digests fit, otherwise digest the digests
+        if len(parts) == 1 or not needs_digest(parts, configuration.synthesis_token_threshold):
+            break
+    return {"digest": join_sections(parts)}
+
+def write_report(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
     topic = state["topic"]
+    if pipelined(Configuration.from_runnable_config(config).synthesis_mode):
+        # Combining the drafts needs no model call
+        return {"content": merge_drafts(ordered_drafts(state))}
     
     llm = get_llm(config)
-    formatted_str_sections = "\n\n".join(f"{s}" for s in sections)
+    formatted_str_sections = report_context(state)
     system_messages = [SystemMessage(
         content=prompts.REPORT_WRITER_INSTRUCTIONS.format(topic=topic, context=formatted_str_sections)
     )]
-    report = llm.invoke(system_messages + [HumanMessage(content=f"Write a report based upon these memos.")])
+    report = llm.invoke(system_messages + [HumanMessage(content=prompts.REPORT_REQUEST)])
     return {"content": report.content}
 
 def write_introduction(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
-    sections = state["sections"]
     topic = state["topic"]
     
     llm = get_llm(config)
-    formatted_str_sections = "\n\n".join(f"{s}" for s in sections)
+    formatted_str_sections = report_context(state)
     
     # Summarize the sections into a final report
     
     instructions = prompts.INTRO_CONCLUSION_INSTRUCTIONS.format(topic=topic, formatted_str_sections=formatted_str_sections)    
-    intro = llm.invoke([SystemMessage(content=instructions)]+[HumanMessage(content=f"Write the report introduction")]) 
+    intro = llm.invoke([SystemMessage(content=instructions)]+[HumanMessage(content=prompts.INTRODUCTION_REQUEST)]) 
     return {"introduction": intro.content}
 
 
 def write_conclusion(state: ResearchGraphState, config: Optional[RunnableConfig] = None):
-    # Full set of sections
-    sections = state["sections"]
     topic = state["topic"]
 
     llm = get_llm(config)
-    # Concat all sections together
-    formatted_str_sections = "\n\n".join(f"{s}" for s in sections)
+    # Concat all sections together (or their digest)
+    formatted_str_sections = report_context(state)
     
     # Summarize the sections into a final report
     
     instructions = prompts.INTRO_CONCLUSION_INSTRUCTIONS.format(topic=topic, formatted_str_sections=formatted_str_sections)    
-    conclusion = llm.invoke([SystemMessage(content=instructions)]+[HumanMessage(content=f"Write the report conclusion")]) 
+    conclusion = llm.invoke([SystemMessage(content=instructions)]+[HumanMessage(content=prompts.CONCLUSION_REQUEST)]) 
     return {"conclusion": conclusion.content}
 
 
 def finalize_report(state: ResearchGraphState):
     """ The is the "reduce" step where we gather all the sections, combine them, and reflect on them to write the intro/conclusion """
-    content = state["content"]
-    if content.startswith("## Insights"):
-        content = content.strip("## Insights")
-    if "## Sources" in content:
-        try:
-            content, sources = content.split("\n## Sources\n")
-        except:
-            sources = None
-    else:
-        sources = None
-        
-    final_report = state["introduction"] + "\n\n---\n\n" + content + "\n\n---\n\n" + state["conclusion"]
-    if sources is not None:
-        final_report += "\n\n## Sources\n" + sources
+    final_report = assemble_report(state["introduction"], state["content"], state["conclusion"])
     return {"final_report": final_report}
@@ -0,0 +1,196 @@
+"""Speculative first interview turns, run while the graph waits at confirm_analysts.
+
+With ``speculative_prewarm`` on, `create_analysts` hands each proposed roster
+to the process-wide `Prewarmer`. Background threads then run every analyst's
+first question, search queries and retrieval while the human reviews the
+analysts. Retrieved results go to the search cache. The question and queries
+are kept here under `warm_key`: topic, analyst identity and the settings they
+depend on, including the models of those two nodes.
+
+When the interviews start, the first turn takes its warm start instead of
+calling the model again, waiting for it if it is still running. A revised
+roster discards the warm starts of analysts that changed, while unchanged
+analysts keep theirs. Speculative calls use the lowest scheduler lane, and
+run with the run's configuration as the current runnable config, so they go
+through the same provider limiters, with the same limits, as the run itself.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import set_config_context
+
+from dr_agent.configuration import Configuration
+from dr_agent.scheduler import PRIORITY_SPECULATIVE, priority_lane
+from dr_agent.search_cache import normalize_query
+from dr_agent.state import Analyst
+
+
+@dataclass(slots=True)
+class WarmStart:
+    question: AIMessage
+    search_queries: list[str]
+
+
+def warm_key(topic: str, analyst: Analyst, configuration: Configuration) -> str:
+    """ Key of an analyst's first turn on a topic, including the settings that change it """
+    text = "\n".join([
+        normalize_query(topic),
+        analyst.identity,
+        configuration.model_for("ask_question"),
+        configuration.model_for("generate_search_query"),
+        str(configuration.search_queries_per_turn),
+    ])
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _as_node(config: RunnableConfig, node: str) -> RunnableConfig:
+    # Outside the graph the node name is not in the metadata; the model tier depends on it
+    return {**config, "metadata": {**(config.get("metadata") or {}), "langgraph_node": node}}
+
+
+def _run_node(node: str, fn: Callable, state: dict, config: RunnableConfig) -> dict:
+    # Run as the graph would: the model clients' rate-limited transport resolves the run's
+    # configuration, and the node's provider, from the current runnable config
+    node_config = _as_node(config, node)
+    with set_config_context(node_config) as context:
+        return context.run(fn, state, node_config)
+
+
+def _first_turn(topic: str, analyst: Analyst, config: RunnableConfig) -> WarmStart:
+    # Imported here: the nodes hand rosters to this module
+    from dr_agent import nodes
+
+    configuration = Configuration.from_runnable_config(config)
+    with priority_lane(PRIORITY_SPECULATIVE):
+        state = {"analyst": analyst, "messages": [nodes.opening_message(topic)]}
+        question = _run_node("ask_question", nodes.generate_question, state, config)["messages"][0]
+        state["messages"] = [*state["messages"], question]
+        queries = _run_node("generate_search_query", nodes.generate_search_query, state, config)["search_queries"]
+        if configuration.search_cache_enabled:
+            # Only the search cache keeps what the retrievers return
+            state["search_queries"] = queries
+            for node, search in (("search_web", nodes.search_web), ("search_wikipedia", nodes.search_wikipedia)):
+                _run_node(node, search, state, config)
+    return WarmStart(question=question, search_queries=queries)
+
+
+class Prewarmer:
+    """Background first turns, one per analyst, grouped by graph thread.
+
+    Warm starts are taken once; ones nobody takes are dropped after
+    ``max_age`` seconds.
+    """
+
+    def __init__(self, max_workers: int = 4, max_age: float = 30 * 60):
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # key -> (group, started at, future)
+        self._entries: dict[str, tuple[str, float, Future]] = {}
+        self._lock = threading.Lock()
+        self._counters = {"started": 0, "taken": 0, "discarded": 0, "failed": 0}
+
+    def start(self, topic: str, analysts: list[Analyst], config: RunnableConfig) -> list[str]:
+        """Warm up the first turn of every analyst not already warm; returns their keys.
+
+        Warm starts of this thread's earlier roster that are not in
+        ``analysts`` are discarded.
+        """
+        configuration = Configuration.from_runnable_config(config)
+        group = str((config.get("configurable") or {}).get("thread_id") or normalize_query(topic))
+        # Only the configuration travels to the worker, not the run's callbacks
+        worker_config = configuration.to_runnable_config()
+        keys = {warm_key(topic, analyst, configuration): analyst for analyst in analysts}
+        now = time.monotonic()
+        with self._lock:
+            for key, (entry_group, started, future) in list(self._entries.items()):
+                if (entry_group == group and key not in keys) or now - started > self.max_age:
+                    future.cancel()
+                    del self._entries[key]
+                    self._counters["discarded"] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="dr-agent-prewarm")
+            for key, analyst in keys.items():
+                if key not in self._entries:
+                    future = self._executor.submit(_first_turn, topic, analyst, worker_config)
+                    self._entries[key] = (group, now, future)
+                    self._counters["started"] += 1
+        return list(keys)
+
+    def _pop(self, key: Optional[str]) -> Optional[Future]:
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None or entry[2].cancelled():
+            return None
+        return entry[2]
+
+    def _result(self, future: Future) -> Optional[WarmStart]:
+        if future.cancelled():
+            return None
+        failed = future.exception() is not None
+        with self._lock:
+            self._counters["failed" if failed else "taken"] += 1
+        return None if failed else future.result()
+
+    def take(self, key: Optional[str]) -> Optional[WarmStart]:
+        """ The warm start for ``key``, waiting for it if it is still running; None if there is none or it failed """
+        future = self._pop(key)
+        if future is None:
+            return None
+        wait([future])
+        return self._result(future)
+
+    async def atake(self, key: Optional[str]) -> Optional[WarmStart]:
+        """ `take` that waits without blocking the event loop """
+        future = self._pop(key)
+        if future is None:
+            return None
+        await asyncio.wait([asyncio.wrap_future(future)])
+        return self._result(future)
+
+    def discard(self, key: str) -> None:
+        """ Drop a warm start that will not be used """
+        future = self._pop(key)
+        if future is not None:
+            future.cancel()
+            with self._lock:
+                self._counters["discarded"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "pending": len(self._entries)}
+
+    def shutdown(self) -> None:
+        """ Drop every warm start and stop the worker threads """
+        with self._lock:
+            for _, _, future in self._entries.values():
+                future.cancel()
+            self._entries.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_prewarmers: dict[int, Prewarmer] = {}
+_prewarmers_lock = threading.Lock()
+
+
+def get_prewarmer(configuration: Configuration) -> Optional[Prewarmer]:
+    """ The process-wide prewarmer for this configuration, or None when speculation is off """
+    if not configuration.speculative_prewarm:
+        return None
+    with _prewarmers_lock:
+        prewarmer = _prewarmers.get(configuration.prewarm_max_workers)
+        if prewarmer is None:
+            prewarmer = _prewarmers[configuration.prewarm_max_workers] = Prewarmer(configuration.prewarm_max_workers)
+        return prewarmer
@@ -14,6 +14,14 @@ ANALYST_INSTRUCTIONS = """You are tasked with creating a set of AI analyst perso
 5. Assign one analyst to each theme.
 """
 
+ANALYST_REVISION_INSTRUCTIONS = """
+6. These are the current analysts, which the feedback above revises:
+
+{analysts}
+
+Keep every analyst the feedback does not ask you to change exactly as written, with the same name, affiliation, role and description. Only replace, change or add the analysts the feedback concerns.
+"""
+
 QUESTION_INSTRUCTIONS = """You are an analyst tasked with interviewing an expert to learn about a specific topic. 
 
 Your goal is boil down to interesting and specific insights related to your topic.
@@ -21,8 +29,6 @@ Your goal is boil down to interesting and specific insights related to your topi
 1. Interesting: Insights that people will find surprising or non-obvious.
         
 2. Specific: Insights that avoid generalities and include specific examples from the expert.
-
-Here is your topic of focus and set of goals: {goals}
         
 Begin by introducing yourself using a name that fits your persona, and then ask your question.
 
@@ -30,27 +36,29 @@ Continue to ask questions to drill down and refine your understanding of the top
         
 When you are satisfied with your understanding, complete the interview with: "Thank you so much for your help!"
 
-Remember to stay in character throughout your response, reflecting the persona and goals provided to you."""
+Remember to stay in character throughout your response, reflecting the persona and goals provided to you.
+
+Here is your topic of focus and set of goals: {goals}"""
 
 SEARCH_INSTRUCTIONS = """You will be given a conversation between an analyst and an expert. 
 
-Your goal is to generate a well-structured query for use in retrieval and / or web-search related to the conversation.
+Your goal is to generate well-structured queries for use in retrieval and / or web-search related to the conversation.
         
 First, analyze the full conversation.
 
 Pay particular attention to the final question posed by the analyst.
 
-Convert this final question into a well-structured web search query"""
+Convert this final question into up to {num_queries} well-structured web search queries.
 
-ANSWER_INSTRUCTIONS = """You are an expert being interviewed by an analyst.
+Make the queries diverse: each should cover a different facet, entity or phrasing of the question, so together they retrieve more than any single query would.
+
+List the most important query first."""
 
-Here is analyst area of focus: {goals}. 
+ANSWER_INSTRUCTIONS = """You are an expert being interviewed by an analyst.
         
 You goal is to answer a question posed by the interviewer.
 
-To answer question, use this context:
-        
-{context}
+To answer each question, use the context that follows it, together with any context given earlier in the interview.
 
 When answering questions, follow these guidelines:
         
@@ -68,14 +76,23 @@ When answering questions, follow these guidelines:
         
 [1] assistant/docs/llama3_1.pdf, page 7 
         
-And skip the addition of the brackets as well as the Document source preamble in your citation."""
+And skip the addition of the brackets as well as the Document source preamble in your citation.
+
+Here is analyst area of focus: {goals}."""
+
+ANSWER_CONTEXT = """Context for the question above:
+
+{context}"""
+
+ANSWER_NO_NEW_CONTEXT = """No new context for the question above; answer it from the context given earlier in the interview."""
 
 SECTION_WRITER_INSTRUCTIONS = """You are an expert technical writer. 
             
-Your task is to create a short, easily digestible section of a report based on a set of source documents.
+Your task is to create a short, easily digestible section of a report based on a digest of an expert interview.
 
-1. Analyze the content of the source documents: 
-- The name of each source document is at the start of the document, with the <Document tag.
+1. Analyze the content of the digest: 
+- Facts are cited statements from the interview; excerpts are passages of the source documents it drew on.
+- Both cite their sources by number, e.g. [2]; the numbers refer to the Sources list at the end of the digest.
         
 2. Create a report structure using markdown formatting:
 - Use ## for the section title
@@ -95,7 +112,7 @@ c. Sources (### header)
 - Create a numbered list of source documents, as you use them
 - Do not mention the names of interviewers or experts
 - Aim for approximately 400 words maximum
-- Use numbered sources in your report (e.g., [1], [2]) based on information from source documents
+- Use numbered sources in your report (e.g., [1], [2]) based on the facts and excerpts, renumbered in the order you use them
         
 6. In the Sources section:
 - Include all sources used in your report
@@ -176,3 +193,58 @@ For your introduction, use ## Introduction as the section header.
 For your conclusion, use ## Conclusion as the section header.
 
 Here are the sections to reflect on for writing: {formatted_str_sections}"""
+
+
+SECTION_DIGEST_INSTRUCTIONS = """You are a technical editor condensing analyst memos for a report on this overall topic:
+
+{topic}
+
+You will be given a batch of memos. Each memo has a title, a summary with numbered citations such as [1] or [2], and a Sources list.
+
+Your task is to write a compact digest of the batch that a report writer can work from instead of the full memos.
+
+1. Keep every memo's title as a ## header, in the order given.
+2. Under each title, keep its key insights as short bullet points, especially specific facts, numbers and examples.
+3. Keep the citation markers next to the facts they support.
+4. Keep each memo's Sources list, with full links, directly under its bullets.
+5. Drop repetition, background and filler.
+6. Include no pre-amble."""
+
+
+SECTION_DRAFT_INSTRUCTIONS = """You are a technical writer drafting one part of a report on this overall topic:
+
+{topic}
+
+You will be given one analyst memo with a title, a summary with numbered citations such as [1] or [2], and a Sources list.
+
+The report is written in parts, one per memo, that are placed one after another under a single ## Insights header.
+
+Your task is to write this memo's part:
+
+1. Write one or two paragraphs that carry the central insights of the memo into the report's narrative.
+2. Use no headers and include no pre-amble.
+3. Do not mention any analyst names.
+4. Keep the citation markers next to the facts they support.
+5. End with the sources you cited, one per line in the memo's format, for example:
+
+[1] Source 1
+[2] Source 2"""
+
+
+ANALYSTS_REQUEST = """Generate the set of analysts."""
+
+INTERVIEW_OPENING = """So you said you were writing an article on {topic}?"""
+
+SECTION_REQUEST = """Use this digest to write your section:
+
+{digest}"""
+
+SECTION_DRAFT_REQUEST = """Draft this memo's part of the report:
+
+{section}"""
+
+REPORT_REQUEST = """Write a report based upon these memos."""
+
+INTRODUCTION_REQUEST = """Write the report introduction"""
+
+CONCLUSION_REQUEST = """Write the report conclusion"""
@@ -0,0 +1,163 @@
+"""Chunking and local BM25 relevance scoring for retrieved documents."""
+
+import re
+from collections import Counter
+from dataclasses import replace
+from typing import Optional
+
+import numpy as np
+
+from dr_agent.documents import Document, count_tokens, document_key
+from dr_agent.embeddings import HashingEmbeddings
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def chunk_text(text: str, chunk_tokens: int = 256) -> list[str]:
+    """ Pack paragraphs into chunks of about ``chunk_tokens``; oversized paragraphs are split on words """
+    chunks, current = [], []
+    current_tokens = 0
+    for paragraph in (p.strip() for p in text.split("\n\n")):
+        if not paragraph:
+            continue
+        pieces = [paragraph]
+        if count_tokens(paragraph) > chunk_tokens:
+            words = paragraph.split()
+            step = max(1, chunk_tokens * 3 // 4)  # ~0.75 words per token
+            pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        for piece in pieces:
+            piece_tokens = count_tokens(piece)
+            if current and current_tokens + piece_tokens > chunk_tokens:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def chunk_documents(documents: list[Document], chunk_tokens: int = 256) -> list[Document]:
+    """ Split context documents into chunk documents that keep their source/page for citation """
+    chunks = []
+    for doc in documents:
+        for index, text in enumerate(chunk_text(doc.content, chunk_tokens)):
+            chunks.append(replace(doc, content=text, tokens=count_tokens(text), chunk=index))
+    return chunks
+
+
+def bm25_scores(query: str, texts: list[str], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """ Okapi BM25 score of every text against ``query`` """
+    if not texts:
+        return np.zeros(0)
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return np.zeros(len(texts))
+    column = {term: j for j, term in enumerate(terms)}
+    tf = np.zeros((len(texts), len(terms)), dtype=np.float64)
+    lengths = np.empty(len(texts), dtype=np.float64)
+    for i, text in enumerate(texts):
+        tokens = tokenize(text)
+        lengths[i] = len(tokens)
+        for term, count in Counter(tokens).items():
+            j = column.get(term)
+            if j is not None:
+                tf[i, j] = count
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(texts) - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+    return ((tf * (k1 + 1)) / (tf + norm[:, None])) @ idf
+
+
+def select_chunks(
+    documents: list[Document],
+    query: str,
+    top_k: int = 8,
+    token_budget: int = 2000,
+    chunk_tokens: int = 256,
+) -> list[Document]:
+    """Return the best-scoring chunks for ``query``, at most ``top_k`` and within ``token_budget``.
+
+    Selected chunks come back in their original document order so the prompt
+    reads naturally; each carries its BM25 score as ``relevance``.
+    """
+    chunks = chunk_documents(documents, chunk_tokens)
+    scores = bm25_scores(query, [chunk.content for chunk in chunks])
+    selected, used = [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        if len(selected) >= top_k:
+            break
+        if used + chunks[i].tokens > token_budget:
+            continue
+        selected.append(int(i))
+        used += chunks[i].tokens
+    return [replace(chunks[i], relevance=float(scores[i])) for i in sorted(selected)]
+
+
+def chunk_key(chunk: Document) -> str:
+    """ Stable identity of a chunk (or whole document) across turns: source, page and chunk index """
+    source, page = document_key(chunk)
+    return f"{source}#{page}#{'' if chunk.chunk is None else chunk.chunk}"
+
+
+def context_novelty(
+    selected: list[Document],
+    seen: list[Document],
+    similarity: float = 0.9,
+    embeddings: Optional[HashingEmbeddings] = None,
+) -> float:
+    """Share of the tokens in ``selected`` that earlier turns have not already covered.
+
+    A chunk counts as covered when it is one of ``seen`` or a near-duplicate
+    of one (cosine similarity of at least ``similarity``), e.g. the same
+    passage syndicated under another URL. Returns 1.0 when nothing was seen
+    yet and 0.0 when nothing was selected.
+    """
+    total = sum(chunk.tokens for chunk in selected)
+    if not total:
+        return 0.0
+    if not seen:
+        return 1.0
+    seen_keys = {chunk_key(chunk) for chunk in seen}
+    candidates = [chunk for chunk in selected if chunk_key(chunk) not in seen_keys]
+    if not candidates:
+        return 0.0
+    embeddings = embeddings or HashingEmbeddings()
+    new = embeddings.embed([chunk.content for chunk in candidates])
+    old = embeddings.embed([chunk.content for chunk in seen])
+    closest = (new @ old.T).max(axis=1)
+    novel = sum(chunk.tokens for chunk, score in zip(candidates, closest) if score < similarity)
+    return novel / total
+
+
+def distinct_queries(queries: list[str], limit: int) -> list[str]:
+    """ Up to ``limit`` non-empty queries, dropping ones that differ only in case or spacing """
+    seen, distinct = set(), []
+    for query in queries:
+        key = " ".join(tokenize(query))
+        if key and key not in seen:
+            seen.add(key)
+            distinct.append(query.strip())
+    return distinct[:limit]
+
+
+def reciprocal_rank_fusion(rankings: list[list[Document]], k: int = 60) -> list[Document]:
+    """Merge ranked document lists, one per query, into one list without duplicate URLs.
+
+    A document scores ``sum(1 / (k + rank))`` over the lists it appears in
+    (rank starting at 1), which becomes its ``score``. The first copy seen is
+    kept; results are ordered by fused score.
+    """
+    fused: dict[tuple[str, str], Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = document_key(doc)
+            if key not in fused:
+                fused[key] = replace(doc, score=0.0)
+            fused[key].score += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda doc: doc.score, reverse=True)
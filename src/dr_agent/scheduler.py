@@ -0,0 +1,589 @@
+"""Shared per-provider scheduling of LLM and search calls.
+
+Each provider ("openai", "tavily", "wikipedia", ...) gets one process-wide
+`ProviderLimiter` that bounds concurrent calls and applies token buckets for
+requests/min and tokens/min. Waiting calls are admitted by priority lane
+(report writing before interview traffic, speculative work last), then in
+arrival order.
+Rate-limit response headers adjust the buckets, and a 429 pauses the whole
+provider with backoff instead of letting every caller retry at once.
+
+Chat model HTTP requests go through `RateLimitedTransport`, installed on the
+pooled clients in `dr_agent.clients`. Search backends are called through
+`run_search` / `arun_search`.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+import httpx
+from langgraph.config import get_config
+
+from dr_agent.configuration import Configuration
+from dr_agent.documents import count_tokens
+
+PRIORITY_REPORT = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_SPECULATIVE = 2
+
+# Report writing is the last stage of a run; it goes ahead of queued interview calls
+NODE_PRIORITIES = {
+    "draft_section": PRIORITY_REPORT,
+    "digest_sections": PRIORITY_REPORT,
+    "write_report": PRIORITY_REPORT,
+    "write_introduction": PRIORITY_REPORT,
+    "write_conclusion": PRIORITY_REPORT,
+    "finalize_report": PRIORITY_REPORT,
+}
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """ Seconds in a rate-limit reset header ("1s", "6m0s", "20ms" or a bare number) """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parts = _DURATION.findall(value)
+        return sum(float(amount) * _UNITS[unit] for amount, unit in parts) if parts else None
+
+
+def _header_float(headers, name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def retry_after(headers) -> Optional[float]:
+    """ Seconds to wait from ``retry-after-ms`` / ``retry-after`` (seconds form only) """
+    milliseconds = _header_float(headers, "retry-after-ms")
+    if milliseconds is not None:
+        return milliseconds / 1000
+    return _header_float(headers, "retry-after")
+
+
+# Lane set by `priority_lane` for calls made outside graph nodes
+_lane: ContextVar[Optional[int]] = ContextVar("dr_agent_priority_lane", default=None)
+
+
+@contextmanager
+def priority_lane(priority: int):
+    """ Admit the calls made inside the block (in this thread or task) in lane ``priority`` """
+    token = _lane.set(priority)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_node() -> Optional[str]:
+    """ Graph node making the call, from the LangGraph run config; None outside a run """
+    try:
+        return (get_config().get("metadata") or {}).get("langgraph_node")
+    except RuntimeError:
+        return None
+
+
+def current_priority() -> int:
+    """ Lane of the graph node making the call, from the LangGraph run config """
+    if _lane.get() is not None:
+        return _lane.get()
+    return NODE_PRIORITIES.get(current_node(), PRIORITY_DEFAULT)
+
+
+class TokenBucket:
+    """Continuously refilled bucket of ``per_minute`` units with a one-minute burst."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.per_minute, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """ Seconds until ``amount`` units are available (requests larger than the bucket wait for a full one) """
+        self._refill(now)
+        amount = min(amount, self.per_minute)
+        return 0.0 if self.level >= amount else (amount - self.level) * 60 / self.per_minute
+
+    def set_rate(self, per_minute: float, now: float) -> None:
+        """ Change the rate and burst in place; the units already used stay used """
+        self._refill(now)
+        self.per_minute = per_minute
+        self.level = min(self.level, per_minute)
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.per_minute)
+
+    def drain_to(self, remaining: float) -> None:
+        """ Trust the server's count when it has less left than we think """
+        self.level = min(self.level, remaining)
+
+
+class _Waiter:
+    __slots__ = ("tokens", "wake", "admitted", "cancelled")
+
+    def __init__(self, tokens: float, wake: Callable[[], None]):
+        self.tokens = tokens
+        self.wake = wake
+        self.admitted = False
+        self.cancelled = False
+
+
+class ProviderLimiter:
+    """Concurrency, request-rate and token-rate limits for one provider, shared by threads and event loops.
+
+    ``None`` disables a limit. When the server reports its limits in
+    ``x-ratelimit-*`` headers, unset rate limits are adopted from them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_backoff: float = 60.0,
+        base_backoff: float = 1.0,
+    ):
+        self.name = name
+        self._lock = threading.Lock()
+        self._queue: list[tuple[int, int, _Waiter]] = []
+        self._order = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._strikes = 0
+        self._timer: Optional[threading.Timer] = None
+        self._timer_due = float("inf")
+        self._throttled = 0
+        self._admitted = 0
+        self._settings: Optional[tuple] = None
+        # One bucket per kind for the limiter's lifetime; reconfiguring changes its rate, never its level
+        self._buckets: dict[str, TokenBucket] = {}
+        # Per-minute limits learned from x-ratelimit-limit-* headers, used when none is configured
+        self._adopted: dict[str, float] = {}
+        self.base_backoff = base_backoff
+        self.configure(max_concurrency, requests_per_minute, tokens_per_minute, max_backoff)
+
+    def configure(
+        self,
+        max_concurrency: Optional[int],
+        requests_per_minute: Optional[float],
+        tokens_per_minute: Optional[float],
+        max_backoff: float = 60.0,
+    ) -> None:
+        """ Update the limits in place; queued calls are re-checked against the new ones """
+        settings = (max_concurrency, requests_per_minute, tokens_per_minute, max_backoff)
+        with self._lock:
+            if settings == self._settings:
+                return
+            self._settings = settings
+            self.max_concurrency = max_concurrency
+            self.max_backoff = max_backoff
+            self._configured = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+            self._requests = self._bucket("requests")
+            self._tokens = self._bucket("tokens")
+            self._dispatch()
+
+    def _bucket(self, kind: str) -> Optional[TokenBucket]:
+        """ The bucket of ``kind`` at the configured (else adopted) rate, or None when that rate is unlimited """
+        per_minute = self._configured[kind] or self._adopted.get(kind)
+        if not per_minute:
+            return None
+        bucket = self._buckets.get(kind)
+        if bucket is None:
+            bucket = self._buckets[kind] = TokenBucket(per_minute)
+        elif bucket.per_minute != per_minute:
+            bucket.set_rate(per_minute, time.monotonic())
+        return bucket
+
+    @property
+    def limits_tokens(self) -> bool:
+        return self._tokens is not None
+
+    # ---------------- Admission ----------------
+    def _blocked_for(self, tokens: float, now: float) -> Optional[float]:
+        """ 0 if a call can start now, seconds to wait if time-limited, None if waiting on a free slot """
+        if self.max_concurrency is not None and self._in_flight >= self.max_concurrency:
+            return None
+        delay = max(0.0, self._paused_until - now)
+        if self._requests is not None:
+            delay = max(delay, self._requests.delay(1, now))
+        if self._tokens is not None and tokens:
+            delay = max(delay, self._tokens.delay(tokens, now))
+        return delay
+
+    def _dispatch(self) -> None:
+        # Caller holds the lock; admits from the head of the queue only, so lanes keep their order
+        while self._queue:
+            _, _, waiter = self._queue[0]
+            if waiter.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            now = time.monotonic()
+            delay = self._blocked_for(waiter.tokens, now)
+            if delay is None:
+                return
+            if delay > 0:
+                self._schedule(now + delay)
+                return
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            self._admitted += 1
+            if self._requests is not None:
+                self._requests.take(1, now)
+            if self._tokens is not None and waiter.tokens:
+                self._tokens.take(waiter.tokens, now)
+            waiter.admitted = True
+            waiter.wake()
+
+    def _schedule(self, due: float) -> None:
+        if self._timer is not None and self._timer_due <= due:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_due = due
+        self._timer = threading.Timer(max(0.0, due - time.monotonic()), self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer, self._timer_due = None, float("inf")
+            self._dispatch()
+
+    def _enqueue(self, waiter: _Waiter, priority: Optional[int]) -> None:
+        priority = current_priority() if priority is None else priority
+        with self._lock:
+            heapq.heappush(self._queue, (priority, next(self._order), waiter))
+            self._dispatch()
+
+    def acquire(self, tokens: float = 0, priority: Optional[int] = None) -> None:
+        """ Block until a call of about ``tokens`` tokens may start; pair with `release` """
+        event = threading.Event()
+        waiter = _Waiter(tokens, event.set)
+        self._enqueue(waiter, priority)
+        event.wait()
+
+    async def aacquire(self, tokens: float = 0, priority: Optional[int] = None) -> None:
+        """ Async `acquire` """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = _Waiter(tokens, wake)
+        self._enqueue(waiter, priority)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter.cancelled = True
+                admitted = waiter.admitted
+            if admitted:
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, tokens: float = 0, priority: Optional[int] = None):
+        self.acquire(tokens, priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self, tokens: float = 0, priority: Optional[int] = None):
+        await self.aacquire(tokens, priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # ---------------- Feedback ----------------
+    def observe(self, status_code: Optional[int], headers: Any = None) -> None:
+        """ Adapt to a response: back off on 429 and sync the buckets with ``x-ratelimit-*`` headers """
+        headers = headers or {}
+        with self._lock:
+            now = time.monotonic()
+            if status_code == 429:
+                self._throttled += 1
+                self._strikes += 1
+                wait = retry_after(headers)
+                if wait is None:
+                    wait = self.base_backoff * 2 ** (self._strikes - 1)
+                self._paused_until = max(self._paused_until, now + min(wait, self.max_backoff))
+            elif status_code is not None and status_code < 400:
+                self._strikes = 0
+
+            for kind in ("requests", "tokens"):
+                limit = _header_float(headers, f"x-ratelimit-limit-{kind}")
+                if limit and not self._configured[kind] and self._adopted.get(kind) != limit:
+                    self._adopted[kind] = limit
+                    if kind == "requests":
+                        self._requests = self._bucket(kind)
+                    else:
+                        self._tokens = self._bucket(kind)
+                bucket = self._requests if kind == "requests" else self._tokens
+                remaining = _header_float(headers, f"x-ratelimit-remaining-{kind}")
+                if bucket is not None and remaining is not None:
+                    bucket.drain_to(remaining)
+                if remaining is not None and remaining <= 0:
+                    reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        self._paused_until = max(self._paused_until, now + min(reset, self.max_backoff))
+            self._dispatch()
+
+    @staticmethod
+    def _status_of(error: BaseException) -> Optional[int]:
+        response = getattr(error, "response", None)
+        return getattr(error, "status_code", None) or getattr(response, "status_code", None)
+
+    def run(self, fn: Callable, *args, priority: Optional[int] = None, **kwargs):
+        """ Call ``fn`` inside a slot; a 429 raised by it pauses the provider before re-raising """
+        with self.slot(priority=priority):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                status = self._status_of(e)
+                if status is not None:
+                    self.observe(status, getattr(getattr(e, "response", None), "headers", None))
+                raise
+
+    async def arun(self, fn: Callable, *args, priority: Optional[int] = None, **kwargs):
+        """ Async `run` for a coroutine function """
+        async with self.aslot(priority=priority):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                status = self._status_of(e)
+                if status is not None:
+                    self.observe(status, getattr(getattr(e, "response", None), "headers", None))
+                raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": sum(1 for _, _, waiter in self._queue if not waiter.cancelled),
+                "admitted": self._admitted,
+                "throttled": self._throttled,
+                "paused_for": max(0.0, self._paused_until - time.monotonic()),
+                "requests_per_minute": self._requests.per_minute if self._requests else None,
+                "tokens_per_minute": self._tokens.per_minute if self._tokens else None,
+            }
+
+
+_limiters: dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(
+    name: str,
+    max_concurrency: Optional[int] = None,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    max_backoff: float = 60.0,
+) -> ProviderLimiter:
+    """ Return the process-wide limiter for ``name``, updated to the given limits """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = ProviderLimiter(name)
+    limiter.configure(max_concurrency, requests_per_minute, tokens_per_minute, max_backoff)
+    return limiter
+
+
+def limiter_stats() -> dict[str, dict]:
+    """ `ProviderLimiter.stats` for every provider seen so far """
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+def llm_limiter(configuration: Configuration, node: Optional[str] = None) -> Optional[ProviderLimiter]:
+    """ Limiter for the provider of the model ``node`` uses (see `Configuration.model_for`), or None when rate limiting is off """
+    if not configuration.rate_limit_enabled:
+        return None
+    provider = configuration.model_for(node).rpartition("/")[0] or "openai"
+    return get_limiter(
+        provider,
+        configuration.llm_max_concurrency,
+        configuration.llm_requests_per_minute,
+        configuration.llm_tokens_per_minute,
+        configuration.rate_limit_max_backoff,
+    )
+
+
+def search_limiter(configuration: Configuration, backend: str) -> Optional[ProviderLimiter]:
+    """ Limiter for a search backend ("tavily", "wikipedia"), or None when rate limiting is off """
+    if not configuration.rate_limit_enabled:
+        return None
+    return get_limiter(
+        backend,
+        configuration.search_max_concurrency,
+        configuration.search_requests_per_minute,
+        None,
+        configuration.rate_limit_max_backoff,
+    )
+
+
+_PAYLOAD_STATUS = re.compile(r"Error (\d{3})\b")
+
+
+def _payload_status(error: Any) -> int:
+    """ HTTP status of an error payload ("Error 429: ..."); one without a status counts as a rate limit """
+    match = _PAYLOAD_STATUS.match(str(error))
+    return int(match.group(1)) if match else 429
+
+
+def _check_search_result(backend: str, result: Any, limiter: Optional[ProviderLimiter]) -> Any:
+    """ Raise the failure a backend returned as an ``{"error": ...}`` payload, pausing its limiter first """
+    error = result.get("error") if isinstance(result, dict) else None
+    if error is None:
+        return result
+    if limiter is not None:
+        limiter.observe(_payload_status(error))
+    if isinstance(error, Exception):
+        raise error
+    raise ValueError(f"{backend} search failed: {error!r}")
+
+
+def run_search(configuration: Configuration, backend: str, fn: Callable, *args, **kwargs):
+    """ Call a search backend under its limiter; an error payload (Tavily's way of failing) is raised """
+    limiter = search_limiter(configuration, backend)
+    result = fn(*args, **kwargs) if limiter is None else limiter.run(fn, *args, **kwargs)
+    return _check_search_result(backend, result, limiter)
+
+
+async def arun_search(configuration: Configuration, backend: str, fn: Callable, *args, **kwargs):
+    """ Async `run_search` for a coroutine function """
+    limiter = search_limiter(configuration, backend)
+    result = await fn(*args, **kwargs) if limiter is None else await limiter.arun(fn, *args, **kwargs)
+    return _check_search_result(backend, result, limiter)
+
+
+# ---------------- HTTP transports for chat model clients ----------------
+def estimate_request_tokens(request: httpx.Request) -> int:
+    """ Prompt estimate from the body size plus the requested completion limit """
+    body = request.content
+    tokens = count_tokens(body.decode("utf-8", "ignore"))
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        return tokens
+    if isinstance(payload, dict):
+        tokens += payload.get("max_completion_tokens") or payload.get("max_tokens") or 0
+    return tokens
+
+
+def _request_limiter() -> Optional[ProviderLimiter]:
+    # Outside a graph run this falls back to the default configuration and model
+    return llm_limiter(Configuration.from_runnable_config(), current_node())
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Holds the slot until the response body has been read and closed."""
+
+    def __init__(self, stream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Sync transport that admits each request through the calling configuration's limiter."""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = _request_limiter()
+        if limiter is None:
+            return self._transport.handle_request(request)
+        limiter.acquire(estimate_request_tokens(request) if limiter.limits_tokens else 0)
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            limiter.release()
+            raise
+        limiter.observe(response.status_code, response.headers)
+        response.stream = _ReleasingStream(response.stream, limiter.release)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async `RateLimitedTransport`."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = _request_limiter()
+        if limiter is None:
+            return await self._transport.handle_async_request(request)
+        await limiter.aacquire(estimate_request_tokens(request) if limiter.limits_tokens else 0)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            limiter.release()
+            raise
+        limiter.observe(response.status_code, response.headers)
+        response.stream = _AsyncReleasingStream(response.stream, limiter.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,99 @@
+"""Search backends shared by the retrieval nodes.
+
+Tavily and the langchain_community Wikipedia loader are imported on first use,
+keeping them off the import path of the graph.
+"""
+
+import asyncio
+import threading
+
+import httpx
+from langchain_core.documents import Document
+
+from dr_agent.clients import load_env
+
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKIPEDIA_USER_AGENT = "deep-research-agent/0.1 (https://github.com/Jerryson520/deep-research-agent)"
+# Same truncation as langchain's WikipediaAPIWrapper, so sync and async nodes see the same text
+WIKIPEDIA_DOC_CONTENT_CHARS_MAX = 4000
+
+
+_tavily_search = None
+_tavily_lock = threading.Lock()
+
+
+def get_tavily_search():
+    """ The process-wide TavilySearch tool, built on first use; it needs TAVILY_API_KEY """
+    global _tavily_search
+    with _tavily_lock:
+        if _tavily_search is None:
+            load_env()
+            from langchain_tavily import TavilySearch
+
+            _tavily_search = TavilySearch(max_results=3)
+        return _tavily_search
+
+
+def wikipedia_search(query: str, load_max_docs: int = 2) -> list[Document]:
+    """ WikipediaLoader(query=..., load_max_docs=...).load() """
+    from langchain_community.document_loaders.wikipedia import WikipediaLoader
+
+    return WikipediaLoader(query=query, load_max_docs=load_max_docs).load()
+
+
+def documents_to_json(docs: list[Document]) -> list[dict]:
+    """ Plain-dict form of loader documents, safe to cache and checkpoint """
+    return [{"page_content": doc.page_content, "metadata": dict(doc.metadata)} for doc in docs]
+
+
+async def _wikipedia_page(client: httpx.AsyncClient, title: str) -> Document | None:
+    response = await client.get(
+        WIKIPEDIA_API_URL,
+        params={
+            "action": "query",
+            "format": "json",
+            "prop": "extracts|info",
+            "explaintext": 1,
+            "exsectionformat": "plain",
+            "inprop": "url",
+            "redirects": 1,
+            "titles": title,
+        },
+    )
+    response.raise_for_status()
+    pages = response.json().get("query", {}).get("pages", {})
+    for page in pages.values():
+        if "missing" in page:
+            continue
+        content = page.get("extract", "")
+        return Document(
+            page_content=content[:WIKIPEDIA_DOC_CONTENT_CHARS_MAX],
+            metadata={
+                "title": page["title"],
+                "summary": content.split("\n\n", 1)[0],
+                "source": page["fullurl"],
+            },
+        )
+    return None
+
+
+async def awikipedia_search(query: str, load_max_docs: int = 2, timeout: float = 20.0) -> list[Document]:
+    """ Async equivalent of WikipediaLoader(query=..., load_max_docs=...).load() """
+    async with httpx.AsyncClient(
+        timeout=timeout, headers={"User-Agent": WIKIPEDIA_USER_AGENT}
+    ) as client:
+        response = await client.get(
+            WIKIPEDIA_API_URL,
+            params={
+                "action": "query",
+                "format": "json",
+                "list": "search",
+                "srsearch": query[:300],
+                "srlimit": load_max_docs,
+            },
+        )
+        response.raise_for_status()
+        titles = [hit["title"] for hit in response.json().get("query", {}).get("search", [])]
+        # Extracts can only be fetched one full page per request, so fan out
+        pages = await asyncio.gather(*(_wikipedia_page(client, title) for title in titles))
+    return [page for page in pages if page is not None]
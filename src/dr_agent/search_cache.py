@@ -0,0 +1,286 @@
+"""Two-tier (memory LRU + SQLite) cache for search backend results."""
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from typing import Any, Awaitable, Callable, Optional
+
+from dr_agent.configuration import Configuration
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+    """ Case-fold and collapse punctuation/whitespace so near-identical queries share a key """
+    return " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+
+
+# Key a source's payload must have; a payload without it is a failed call, not an empty result
+_REQUIRED_KEYS = {"web": "results"}
+
+
+def _serialize_payload(source: str, value: Any) -> str:
+    """ JSON text of a search result to cache, raising ValueError for an error payload instead of storing it """
+    if isinstance(value, dict) and "error" in value:
+        raise ValueError(f"{source} search failed: {value['error']!r}")
+    required = _REQUIRED_KEYS.get(source)
+    if required is not None and not (isinstance(value, dict) and required in value):
+        raise ValueError(f"{source} search returned no {required!r}: {value!r:.200}")
+    try:
+        return json.dumps(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{source} search returned a result that is not JSON-serializable: {e}") from e
+
+
+class BaseSearchCache:
+    """Interface for search result caches.
+
+    ``fetch``/``afetch`` return the cached value for ``(source, query)`` when it
+    is younger than ``ttl`` seconds, otherwise call ``fetch`` with the raw query
+    and store its (JSON-serializable) result. A result that fails
+    `_serialize_payload` is raised as ValueError and never stored.
+    """
+
+    def get(self, source: str, query: str, ttl: float) -> Optional[Any]:
+        return None
+
+    def set(self, source: str, query: str, value: Any) -> None:
+        _serialize_payload(source, value)
+
+    def stats(self) -> dict:
+        return {}
+
+    def fetch(self, source: str, query: str, ttl: float, fetch: Callable[[str], Any]) -> Any:
+        value = self.get(source, query, ttl)
+        if value is None:
+            value = fetch(query)
+            self.set(source, query, value)
+        return value
+
+    async def afetch(self, source: str, query: str, ttl: float, fetch: Callable[[str], Awaitable[Any]]) -> Any:
+        value = self.get(source, query, ttl)
+        if value is None:
+            value = await fetch(query)
+            self.set(source, query, value)
+        return value
+
+
+class NullSearchCache(BaseSearchCache):
+    """Cache that never stores anything, used when caching is disabled."""
+
+
+class SearchCache(BaseSearchCache):
+    """In-memory LRU tier in front of an optional on-disk SQLite tier.
+
+    Entries record when they were written; the TTL is applied on read, so each
+    source can use its own freshness window against the same store.
+
+    Concurrent misses on the same key are coalesced: the first caller fetches
+    and the others wait for its result, from any thread or event loop.
+    ``afetch`` does the SQLite reads and writes in a worker thread, so the
+    event loop is not blocked by disk I/O.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1024):
+        self.path = os.path.expanduser(path) if path is not None else None
+        self.max_entries = max_entries
+        self._memory: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "writes": 0}
+        self._in_flight: dict[tuple[str, str], Future] = {}
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                " source TEXT NOT NULL,"
+                " query TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (source, query))"
+            )
+            self._conn.commit()
+
+    def get(self, source: str, query: str, ttl: float) -> Optional[Any]:
+        key = (source, normalize_query(query))
+        value = self._from_memory(key, ttl)
+        return value if value is not None else self._from_disk(key, ttl)
+
+    def _from_memory(self, key: tuple[str, str], ttl: float) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] < ttl:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return entry[1]
+            return None
+
+    def _from_disk(self, key: tuple[str, str], ttl: float) -> Optional[Any]:
+        """ The SQLite tier's entry (remembered in memory), counting a miss when there is none """
+        now = time.time()
+        with self._lock:
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM search_cache WHERE source = ? AND query = ?",
+                    key,
+                ).fetchone()
+                if row is not None and now - row[1] < ttl:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self._counters["disk_hits"] += 1
+                    return value
+
+            self._counters["misses"] += 1
+            return None
+
+    # ---------------- Coalesced fetches ----------------
+    def _claim(self, key: tuple[str, str]) -> tuple[Future, bool]:
+        """ The in-flight fetch of ``key``, and whether the caller started it (and must settle it) """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                return future, False
+            future = self._in_flight[key] = Future()
+            return future, True
+
+    def _settle(self, key: tuple[str, str], future: Future, value: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is None:
+            future.set_result(value)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # The fetching caller was cancelled or interrupted; waiters fetch for themselves
+            future.cancel()
+
+    def fetch(self, source: str, query: str, ttl: float, fetch: Callable[[str], Any]) -> Any:
+        key = (source, normalize_query(query))
+        value = self._from_memory(key, ttl)
+        if value is not None:
+            return value
+        while True:
+            future, owner = self._claim(key)
+            if owner:
+                break
+            try:
+                return future.result()
+            except CancelledError:
+                continue
+        try:
+            value = self._from_disk(key, ttl)
+            if value is None:
+                value = fetch(query)
+                self.set(source, query, value)
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, value)
+        return value
+
+    async def afetch(self, source: str, query: str, ttl: float, fetch: Callable[[str], Awaitable[Any]]) -> Any:
+        key = (source, normalize_query(query))
+        value = self._from_memory(key, ttl)
+        if value is not None:
+            return value
+        while True:
+            future, owner = self._claim(key)
+            if owner:
+                break
+            try:
+                # Shielded so that cancelling this waiter leaves the shared fetch alone
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+        try:
+            value = await self._off_loop(self._from_disk, key, ttl)
+            if value is None:
+                value = await fetch(query)
+                await self._off_loop(self.set, source, query, value)
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, value)
+        return value
+
+    async def _off_loop(self, fn: Callable, *args) -> Any:
+        # Only the SQLite tier does I/O; memory-only caches stay on the loop
+        return await asyncio.to_thread(fn, *args) if self._conn is not None else fn(*args)
+
+    def set(self, source: str, query: str, value: Any) -> None:
+        key = (source, normalize_query(query))
+        # Checked before either tier is written, so a failed call is never served from memory
+        text = _serialize_payload(source, value)
+        now = time.time()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (source, query, value, created_at) VALUES (?, ?, ?, ?)",
+                    (*key, text, now),
+                )
+                self._conn.commit()
+            self._remember(key, now, value)
+            self._counters["writes"] += 1
+
+    def _remember(self, key: tuple[str, str], created_at: float, value: Any) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def prune(self, max_age: float) -> int:
+        """ Delete on-disk entries older than ``max_age`` seconds; returns the number removed """
+        if self._conn is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM search_cache WHERE created_at < ?", (time.time() - max_age,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            # A coalesced lookup is served without its own fetch, like a hit
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["coalesced"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hits": hits,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_null_cache = NullSearchCache()
+_caches: dict[tuple[Optional[str], int], SearchCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_search_cache(configuration: Configuration) -> BaseSearchCache:
+    """ Return the process-wide cache for this configuration's cache settings """
+    if not configuration.search_cache_enabled:
+        return _null_cache
+    key = (configuration.search_cache_path, configuration.search_cache_max_entries)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = SearchCache(*key)
+        return cache
@@ -0,0 +1,142 @@
+"""Finished report sections keyed by topic and analyst, for incremental re-planning.
+
+An analyst's identity is a hash of its persona fields, so when feedback
+revises the roster, the analysts it leaves unchanged map to the same key and
+their sections are reused instead of being interviewed again. The key also
+covers the interview models and retrieval settings, so a section is never
+reused under a configuration that would have written it differently. Same two
+tiers as the search cache: an in-memory LRU in front of an optional SQLite file.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from dr_agent.configuration import Configuration
+from dr_agent.search_cache import normalize_query
+from dr_agent.state import Analyst
+
+
+# Retrieval settings that change what a section cites
+_SECTION_SETTINGS = (
+    "search_queries_per_turn",
+    "max_search_results",
+    "context_token_budget",
+    "chunk_tokens",
+    "rerank_enabled",
+    "rerank_top_k",
+    "rerank_token_budget",
+    "novelty_threshold",
+    "novelty_similarity",
+    "local_corpus_path",
+    "local_corpus_embeddings",
+    "local_corpus_top_k",
+    "section_digest_tokens",
+)
+
+
+def section_key(topic: str, analyst: Analyst, max_num_turns: int, configuration: Configuration) -> str:
+    """ Store key of the section an analyst writes on a topic, including the models and settings that change it """
+    # Imported here: the graph imports the nodes, which import this module
+    from dr_agent.graph import INTERVIEW_NODES
+
+    text = "\n".join([
+        normalize_query(topic),
+        analyst.identity,
+        str(max_num_turns),
+        # Every interview node's model, by the node names `Configuration.node_models` uses
+        *(f"{node}={configuration.model_for(node)}" for node in INTERVIEW_NODES),
+        *(f"{name}={getattr(configuration, name)!r}" for name in _SECTION_SETTINGS),
+    ])
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SectionStore:
+    """In-memory LRU tier in front of an optional on-disk SQLite tier.
+
+    Like the search cache, entries record when they were written and the
+    TTL is applied on read.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 256):
+        self.path = os.path.expanduser(path) if path is not None else None
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._counters = {"hits": 0, "misses": 0, "writes": 0}
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sections ("
+                " key TEXT PRIMARY KEY,"
+                " section TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[str]:
+        """ The stored section, unless missing or older than ``ttl`` seconds (None: never stale) """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute("SELECT created_at, section FROM sections WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, *entry)
+            if entry is None or (ttl is not None and now - entry[0] >= ttl):
+                self._counters["misses"] += 1
+                return None
+            self._memory.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[1]
+
+    def put(self, key: str, section: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, section)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sections (key, section, created_at) VALUES (?, ?, ?)",
+                    (key, section, now),
+                )
+                self._conn.commit()
+            self._counters["writes"] += 1
+
+    def _remember(self, key: str, created_at: float, section: str) -> None:
+        self._memory[key] = (created_at, section)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "memory_entries": len(self._memory)}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_stores: dict[Optional[str], SectionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_section_store(configuration: Configuration) -> Optional[SectionStore]:
+    """ The process-wide section store for this configuration, or None when reuse is disabled """
+    if not configuration.section_store_enabled:
+        return None
+    with _stores_lock:
+        store = _stores.get(configuration.section_store_path)
+        if store is None:
+            store = _stores[configuration.section_store_path] = SectionStore(configuration.section_store_path)
+        return store
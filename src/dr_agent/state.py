@@ -1,8 +1,10 @@
+import hashlib
 import operator
 from langgraph.graph import START, END, StateGraph, MessagesState
 from typing import List, Annotated, Literal
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 from pydantic import BaseModel, Field
+from dr_agent.documents import DocumentStore, merge_context
 
 # ---------------- Analyst Models ----------------
 class Analyst(BaseModel):
@@ -22,6 +24,13 @@ class Analyst(BaseModel):
     def persona(self) -> str:
         return f"Name: {self.name}\nRole: {self.role}\nAffiliation: {self.affiliation}\nDescription: {self.description}\n" 
     
+    @property
+    def identity(self) -> str:
+        """ Stable hash of the persona fields (case and whitespace folded); unchanged analysts keep it across roster revisions """
+        fields = (self.name, self.role, self.affiliation, self.description)
+        text = "\x1f".join(" ".join(value.lower().split()) for value in fields)
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+    
     
 class Perspectives(BaseModel):
     analysts: list[Analyst] = Field(
@@ -31,26 +40,45 @@ class Perspectives(BaseModel):
 # ---------------- Conduct Interviews ----------------    
 class InterviewState(MessagesState):
     max_num_turns: int
-    context: Annotated[list, operator.add]
+    num_turns: int
+    novelty: float
+    seen_chunks: Annotated[list[str], operator.add]
+    turn_context: Annotated[list[str], operator.add]
+    section_key: str
+    warm_key: str
+    warm_queries: list[str]
+    topic: str
+    context: Annotated[DocumentStore, merge_context]
+    selected_context: list
     analyst: Analyst
+    search_queries: list[str]
     interview: str
     sections: list
+    drafts: list
 
 class InterviewOutputState(MessagesState):
-    max_num_turns: int
     sections: list
+    drafts: list
 
 # ---------------- Research Graph State ----------------
 class ResearchGraphInputState(TypedDict):
     topic: str
     max_analysts: int
+    max_num_turns: int
+    # Optional roster to start from (e.g. a previous run's), revised by the feedback if any
+    analysts: NotRequired[list[Analyst]]
+    human_analyst_feedback: NotRequired[str]
 
 class ResearchGraphState(TypedDict):
     topic: str
     max_analysts: int
+    max_num_turns: int
     human_analyst_feedback: str
     analysts: list[Analyst]
     sections: Annotated[list, operator.add]
+    # Pipelined synthesis: {"section": ..., "draft": ...} per section
+    drafts: Annotated[list, operator.add]
+    digest: str
     introduction: str
     content: str
     conclusion: str
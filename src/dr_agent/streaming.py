@@ -0,0 +1,161 @@
+"""Progressive assembly of the final report from streamed report-writer tokens."""
+
+from typing import Any, AsyncIterator, Iterator, Optional
+
+INSIGHTS_HEADER = "## Insights"
+SOURCES_MARKER = "\n## Sources\n"
+SEPARATOR = "\n\n---\n\n"
+
+# Report-writing node -> the state key it writes, in final report order
+REPORT_NODES = {
+    "write_introduction": "introduction",
+    "write_report": "content",
+    "write_conclusion": "conclusion",
+}
+
+
+def split_report_body(content: str) -> tuple[str, Optional[str]]:
+    """ Drop the leading "## Insights" header and split off the "## Sources" section, if any """
+    if content.startswith(INSIGHTS_HEADER):
+        content = content[len(INSIGHTS_HEADER):]
+    body, marker, sources = content.partition(SOURCES_MARKER)
+    return (body, sources) if marker else (content, None)
+
+
+def assemble_report(introduction: str, content: str, conclusion: str) -> str:
+    """ Final Markdown: intro, body, conclusion, then the body's sources """
+    body, sources = split_report_body(content)
+    final_report = introduction + SEPARATOR + body + SEPARATOR + conclusion
+    if sources is not None:
+        final_report += "\n\n## Sources\n" + sources
+    return final_report
+
+
+class _BodyFilter:
+    """Incremental `split_report_body`: passes body text through, diverts sources."""
+
+    def __init__(self):
+        self.pending = ""
+        self.header_checked = False
+        self.sources: Optional[str] = None
+
+    def feed(self, text: str) -> str:
+        if self.sources is not None:
+            self.sources += text
+            return ""
+        self.pending += text
+        if not self.header_checked:
+            if len(self.pending) < len(INSIGHTS_HEADER) and INSIGHTS_HEADER.startswith(self.pending):
+                return ""
+            if self.pending.startswith(INSIGHTS_HEADER):
+                self.pending = self.pending[len(INSIGHTS_HEADER):]
+            self.header_checked = True
+
+        body, marker, sources = self.pending.partition(SOURCES_MARKER)
+        if marker:
+            self.pending, self.sources = "", sources
+            return body
+        # Hold back a tail that could be the start of a marker split across chunks
+        keep = len(SOURCES_MARKER) - 1
+        out, self.pending = self.pending[:-keep], self.pending[-keep:]
+        return out
+
+    def flush(self) -> str:
+        out, self.pending = self.pending, ""
+        return out
+
+
+class ReportAssembler:
+    r"""Turns out-of-order token streams from the three report writers into ordered Markdown.
+
+    The writers run in parallel; the introduction is emitted live, while the body
+    and conclusion are buffered until every earlier part has finished. The
+    concatenated output equals `assemble_report` on the finished parts, also
+    for parts that arrive whole, without streamed tokens:
+
+    >>> parts = {"write_introduction": "# T", "write_report": "## Insights\nBody\n## Sources\n[1] a", "write_conclusion": "End"}
+    >>> assembler = ReportAssembler()
+    >>> out = "".join(assembler.finish(node, text) for node, text in parts.items())
+    >>> out == assemble_report(*parts.values())
+    True
+    """
+
+    def __init__(self):
+        self._order = list(REPORT_NODES)
+        self._buffers = {node: "" for node in self._order}
+        self._received = {node: False for node in self._order}
+        self._finished = {node: False for node in self._order}
+        self._active = 0
+        self._body = _BodyFilter()
+
+    @property
+    def done(self) -> bool:
+        return self._active == len(self._order)
+
+    def feed(self, node: str, text: str) -> str:
+        """ Add streamed text for ``node``; returns the Markdown that can be emitted now """
+        if node not in self._buffers or self._finished[node] or not text:
+            return ""
+        self._received[node] = True
+        if node == "write_report":
+            text = self._body.feed(text)
+        self._buffers[node] += text
+        return self._drain()
+
+    def finish(self, node: str, text: str = "") -> str:
+        """ Mark ``node`` as done; ``text`` is its full output, used if no tokens were streamed """
+        if node not in self._buffers or self._finished[node]:
+            return ""
+        # Feeding the full text may already emit it when this node is the active part
+        out = self.feed(node, text) if not self._received[node] else ""
+        if node == "write_report":
+            self._buffers[node] += self._body.flush()
+        self._finished[node] = True
+        return out + self._drain()
+
+    def _drain(self) -> str:
+        out = []
+        while not self.done:
+            node = self._order[self._active]
+            out.append(self._buffers[node])
+            self._buffers[node] = ""
+            if not self._finished[node]:
+                break
+            self._active += 1
+            if not self.done:
+                out.append(SEPARATOR)
+            elif self._body.sources is not None:
+                out.append("\n\n## Sources\n" + self._body.sources)
+        return "".join(out)
+
+    def on_event(self, mode: str, payload: Any) -> str:
+        """ Handle one ``(mode, payload)`` event from ``stream_mode=["messages", "updates"]`` """
+        if mode == "messages":
+            chunk, metadata = payload
+            if isinstance(chunk.content, str):
+                return self.feed(metadata.get("langgraph_node", ""), chunk.content)
+        elif mode == "updates":
+            out = []
+            for node, update in payload.items():
+                if node in REPORT_NODES and isinstance(update, dict):
+                    out.append(self.finish(node, update.get(REPORT_NODES[node], "")))
+            return "".join(out)
+        return ""
+
+
+def stream_report(graph, input: Any, config: Optional[dict] = None) -> Iterator[str]:
+    """ Run ``graph`` and yield the final report's Markdown as it becomes available """
+    assembler = ReportAssembler()
+    for mode, payload in graph.stream(input, config, stream_mode=["messages", "updates"]):
+        piece = assembler.on_event(mode, payload)
+        if piece:
+            yield piece
+
+
+async def astream_report(graph, input: Any, config: Optional[dict] = None) -> AsyncIterator[str]:
+    """ Async `stream_report` """
+    assembler = ReportAssembler()
+    async for mode, payload in graph.astream(input, config, stream_mode=["messages", "updates"]):
+        piece = assembler.on_event(mode, payload)
+        if piece:
+            yield piece
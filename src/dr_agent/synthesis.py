@@ -0,0 +1,202 @@
+"""Token-budgeted digests of each interview for its section writer and of the sections for report writing, plus the pipelined report body."""
+
+import re
+from typing import Callable
+
+import numpy as np
+
+from dr_agent.documents import Document, count_tokens, normalize_url
+from dr_agent.retrieval import bm25_scores, tokenize
+from dr_agent.streaming import INSIGHTS_HEADER
+
+
+SYNTHESIS_MODES = ("batch", "pipelined")
+
+
+def pipelined(synthesis_mode: str) -> bool:
+    """ Whether sections are drafted into the report body as they arrive """
+    if synthesis_mode not in SYNTHESIS_MODES:
+        raise ValueError(f"Unknown synthesis mode {synthesis_mode!r}, expected one of {SYNTHESIS_MODES}")
+    return synthesis_mode == "pipelined"
+
+
+def join_sections(sections: list[str]) -> str:
+    return "\n\n".join(f"{s}" for s in sections)
+
+
+def needs_digest(sections: list[str], token_threshold: int) -> bool:
+    """ Whether the combined sections are too large to send to the report writers as-is """
+    return count_tokens(join_sections(sections)) > token_threshold
+
+
+def batch_sections(sections: list[str], batch_tokens: int) -> list[list[str]]:
+    """ Greedily pack sections, in order, into batches of at most ``batch_tokens``; oversized sections go alone """
+    batches, current, current_tokens = [], [], 0
+    for section in sections:
+        tokens = count_tokens(section)
+        if current and current_tokens + tokens > batch_tokens:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(section)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def ordered_drafts(state: dict) -> list[str]:
+    """ The pipelined section drafts, in section order """
+    drafts = {draft["section"]: draft["draft"] for draft in state.get("drafts") or []}
+    return [drafts[section] for section in state["sections"] if section in drafts]
+
+
+def report_context(state: dict) -> str:
+    """ What the report, introduction and conclusion writers read: the shared digest or the section drafts when there are any """
+    if state.get("digest"):
+        return state["digest"]
+    return join_sections(ordered_drafts(state) if state.get("drafts") else state["sections"])
+
+
+# ---------------- Section digest ----------------
+_CITATION = re.compile(r"\[(\d+(?:\s*,\s*\d+)*)\]")
+_SOURCE_LINE = re.compile(r"^\s*\[(\d+)\]\s*(.+?)\s*$")
+_SOURCES_HEADER = re.compile(r"^\s*(#+\s*)?\**sources?\**:?\s*$", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_URL = re.compile(r"https?://\S+")
+
+
+def _source_key(label: str) -> str:
+    url = _URL.search(label)
+    if url:
+        return normalize_url(url.group(0).rstrip(").,>"))
+    return " ".join(label.lower().split())
+
+
+def source_label(doc: Document) -> str:
+    """ How a document is cited: its URL, or its path plus page for paged sources """
+    if doc.page:
+        return f"{doc.source}, page {doc.page}"
+    return doc.source
+
+
+class _Sources:
+    """Global source numbering shared by every answer of one interview."""
+
+    def __init__(self):
+        self.labels: list[str] = []
+        self._numbers: dict[str, int] = {}
+
+    def number(self, label: str) -> int:
+        key = _source_key(label)
+        if key not in self._numbers:
+            self.labels.append(label)
+            self._numbers[key] = len(self.labels)
+        return self._numbers[key]
+
+
+def _source_block(text: str) -> tuple[list[str], dict[str, str]]:
+    """ Lines of ``text`` before its trailing ``[n] label`` source list, and the labels by local number """
+    lines = text.splitlines()
+    local = {}
+    while lines and (not lines[-1].strip() or _SOURCE_LINE.match(lines[-1]) or _SOURCES_HEADER.match(lines[-1])):
+        match = _SOURCE_LINE.match(lines.pop())
+        if match:
+            local[match.group(1)] = match.group(2)
+    return lines, local
+
+
+def _renumberer(local: dict[str, str], sources: _Sources) -> Callable[[re.Match], str]:
+    """ Citation substitution from local numbers to ``sources`` numbers; undefined citations are dropped """
+    def renumber(match: re.Match) -> str:
+        numbers = [sources.number(local[n]) for n in re.split(r"\s*,\s*", match.group(1)) if n in local]
+        return "".join(f"[{n}]" for n in dict.fromkeys(numbers))
+    return renumber
+
+
+def cited_facts(answer: str, sources: _Sources) -> list[str]:
+    """Sentences of an expert answer that cite a source, renumbered into ``sources``.
+
+    The source list at the end of the answer (lines starting with ``[n]``)
+    maps its local citation numbers to labels; citations it does not define
+    are dropped, and so are sentences left without any.
+    """
+    lines, local = _source_block(answer)
+    renumber = _renumberer(local, sources)
+    facts = []
+    for sentence in _SENTENCE_END.split(" ".join(" ".join(lines).split())):
+        if _CITATION.search(sentence):
+            fact = " ".join(_CITATION.sub(renumber, sentence).split()).strip(" -*")
+            if _CITATION.search(fact):
+                facts.append(fact)
+    return facts
+
+
+def section_digest(answers: list[str], excerpts: list[Document], query: str, token_budget: int) -> str:
+    """Compact, cited source material for writing one section, at most ``token_budget`` tokens.
+
+    Cited sentences from the expert ``answers`` come first, deduplicated and
+    in interview order, then the ``excerpts`` (context chunks the answers were
+    given) most relevant to ``query`` and the facts, while they fit. Every
+    kept fact and excerpt cites a number from the Sources list at the end.
+    """
+    sources = _Sources()
+    facts, seen = [], set()
+    for answer in answers:
+        for fact in cited_facts(answer, sources):
+            key = " ".join(tokenize(_CITATION.sub("", fact)))
+            if key and key not in seen:
+                seen.add(key)
+                facts.append(fact)
+
+    scores = bm25_scores("\n".join([query, *facts]), [chunk.content for chunk in excerpts])
+    ranked = [excerpts[i] for i in np.argsort(-scores, kind="stable")]
+
+    def render(kept_facts: list[str], kept_excerpts: list[str], cited: list[int]) -> str:
+        parts = []
+        if kept_facts:
+            parts.append("Facts:\n" + "\n".join(f"- {fact}" for fact in kept_facts))
+        if kept_excerpts:
+            parts.append("Excerpts:\n" + "\n\n".join(kept_excerpts))
+        parts.append("Sources:\n" + "\n".join(f"[{n}] {sources.labels[n - 1]}" for n in sorted(cited)))
+        return "\n\n".join(parts)
+
+    kept_facts, kept_excerpts, cited, used = [], [], set(), 0
+    for fact in facts:
+        numbers = {int(n) for group in _CITATION.findall(fact) for n in re.split(r"\s*,\s*", group)}
+        cost = count_tokens(fact) + sum(count_tokens(sources.labels[n - 1]) for n in numbers - cited) + 4
+        if used + cost > token_budget:
+            break
+        kept_facts.append(fact)
+        cited |= numbers
+        used += cost
+    for chunk in ranked:
+        number = sources.number(source_label(chunk))
+        excerpt = f"[{number}] {chunk.content.strip()}"
+        cost = count_tokens(excerpt) + (count_tokens(sources.labels[number - 1]) if number not in cited else 0) + 4
+        if used + cost > token_budget:
+            continue
+        kept_excerpts.append(excerpt)
+        cited.add(number)
+        used += cost
+    return render(kept_facts, kept_excerpts, sorted(cited))
+
+
+# ---------------- Pipelined report body ----------------
+def merge_drafts(drafts: list[str]) -> str:
+    """Report body from per-section drafts, without a model call.
+
+    The drafts' paragraphs follow one ``## Insights`` header in the given
+    order. Their citations are renumbered into a single ``## Sources`` list,
+    in which a source cited by several drafts appears once.
+    """
+    sources = _Sources()
+    paragraphs = []
+    for draft in drafts:
+        lines, local = _source_block(draft)
+        text = _CITATION.sub(_renumberer(local, sources), "\n".join(lines)).strip()
+        if text:
+            paragraphs.append(text)
+    content = INSIGHTS_HEADER + "\n\n" + "\n\n".join(paragraphs)
+    if sources.labels:
+        content += "\n\n## Sources\n" + "\n".join(f"[{n}] {label}" for n, label in enumerate(sources.labels, start=1))
+    return content
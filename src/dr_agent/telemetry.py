@@ -0,0 +1,433 @@
+"""Per-node timing, token and cost instrumentation collected from graph callbacks.
+
+`NodeTelemetry` is a callback handler, so node code needs no changes: every
+LangGraph node run becomes one record with its wall time, queue wait, LLM
+prompt/completion/cached tokens, search time and estimated cost, tagged by thread id,
+analyst name and interview turn. Records can be exported as OpenTelemetry
+spans and as Prometheus counters/histograms (``pip install
+"deep-research[telemetry]"``); every callback is O(1), so it can stay on.
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+
+from dr_agent.configuration import Configuration
+
+# USD per million (prompt, completion) tokens; unknown models are costed at zero
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "o4-mini": (1.10, 4.40),
+}
+
+# USD per million prompt tokens served from the provider's prompt cache; other models pay the full prompt price
+CACHED_PROMPT_PRICES: dict[str, float] = {
+    "gpt-4o-mini": 0.075,
+    "gpt-4o": 1.25,
+    "gpt-4.1-nano": 0.025,
+    "gpt-4.1-mini": 0.10,
+    "gpt-4.1": 0.50,
+    "o4-mini": 0.275,
+}
+
+# Nodes whose own wall time is search time when no tool/retriever runs are seen inside them
+SEARCH_NODES = frozenset({"search_web", "search_wikipedia", "search_local_corpus"})
+
+SUPPORTED_EXPORTERS = ("opentelemetry", "prometheus")
+
+
+def estimate_cost(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    prices: dict[str, tuple[float, float]] = MODEL_PRICES,
+    cached_tokens: int = 0,
+    cached_prices: dict[str, float] = CACHED_PROMPT_PRICES,
+) -> float:
+    """ Estimated USD cost of one call; ``cached_tokens`` of the prompt are billed at the cached rate """
+    name = model.rpartition("/")[2]
+    prompt_price, completion_price = prices.get(name, (0.0, 0.0))
+    cached_price = cached_prices.get(name, prompt_price)
+    uncached = prompt_tokens - cached_tokens
+    return (uncached * prompt_price + cached_tokens * cached_price + completion_tokens * completion_price) / 1_000_000
+
+
+@dataclass(slots=True)
+class NodeRun:
+    """One execution of a graph node."""
+
+    node: str
+    thread_id: Optional[str]
+    namespace: str
+    step: int
+    analyst: Optional[str] = None
+    turn: Optional[int] = None
+    start: float = 0.0
+    duration: float = 0.0
+    queue_wait: float = 0.0
+    search_time: float = 0.0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Prompt tokens the provider served from its prompt cache
+    cached_tokens: int = 0
+    cost: float = 0.0
+    error: Optional[str] = None
+    span: Any = field(default=None, repr=False)
+
+    def tags(self) -> dict[str, Any]:
+        tags = {"node": self.node, "thread_id": self.thread_id, "analyst": self.analyst, "turn": self.turn}
+        return {key: value for key, value in tags.items() if value is not None}
+
+
+def _interview_tags(inputs: Any) -> tuple[Optional[str], Optional[int]]:
+    if not isinstance(inputs, dict) or "analyst" not in inputs:
+        return None, None
+    analyst = getattr(inputs["analyst"], "name", None)
+    answers = inputs.get("num_turns", 0)
+    max_turns = inputs.get("max_num_turns")
+    turn = answers + 1 if max_turns is None else min(answers + 1, max_turns)
+    return analyst, turn
+
+
+class _Prometheus:
+    """The Prometheus metric families, created once per registry."""
+
+    _instances: dict[int, "_Prometheus"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, registry):
+        from prometheus_client import Counter, Histogram
+
+        buckets = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+        # thread_id/analyst stay on the spans: as labels they would be unbounded
+        self.node_seconds = Histogram(
+            "dr_agent_node_duration_seconds", "Wall time of a graph node", ["node"], buckets=buckets, registry=registry
+        )
+        self.queue_seconds = Histogram(
+            "dr_agent_node_queue_wait_seconds", "Time a node waited after its step became ready", ["node"],
+            buckets=buckets, registry=registry,
+        )
+        self.search_seconds = Histogram(
+            "dr_agent_search_duration_seconds", "Search time inside a node", ["node"], buckets=buckets, registry=registry
+        )
+        self.node_errors = Counter("dr_agent_node_errors", "Failed node runs", ["node"], registry=registry)
+        self.llm_calls = Counter("dr_agent_llm_calls", "Chat model calls", ["node", "model"], registry=registry)
+        self.llm_tokens = Counter(
+            "dr_agent_llm_tokens",
+            "Chat model tokens; 'cached' counts the prompt tokens served from the provider's prompt cache",
+            ["node", "model", "type"],
+            registry=registry,
+        )
+        self.llm_cost = Counter("dr_agent_llm_cost_usd", "Estimated chat model cost", ["node", "model"], registry=registry)
+
+    @classmethod
+    def for_registry(cls, registry=None) -> "_Prometheus":
+        try:
+            from prometheus_client import REGISTRY
+        except ImportError as e:
+            raise ImportError(
+                "The prometheus exporter needs prometheus-client: pip install \"deep-research[telemetry]\""
+            ) from e
+        registry = registry if registry is not None else REGISTRY
+        with cls._lock:
+            if id(registry) not in cls._instances:
+                cls._instances[id(registry)] = cls(registry)
+            return cls._instances[id(registry)]
+
+
+class NodeTelemetry(BaseCallbackHandler):
+    """Callback handler recording every graph node run.
+
+    Pass it in the run config (``config={"callbacks": [telemetry]}``) or set
+    ``telemetry_enabled`` so `create_research_graph` attaches the process-wide
+    instance. LLM calls, tools and retrievers are attributed to the innermost
+    node that started them. Queue wait is the time between the previous step
+    of the same (sub)graph finishing and the node starting.
+
+    The last ``max_records`` runs are kept in `records`; `summary` aggregates
+    them per node.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self,
+        tracer: Any = None,
+        prometheus_registry: Any = None,
+        prometheus: bool = False,
+        prices: Optional[dict[str, tuple[float, float]]] = None,
+        cached_prices: Optional[dict[str, float]] = None,
+        max_records: int = 10000,
+        max_namespaces: int = 1024,
+    ):
+        self.tracer = tracer
+        self.prometheus = _Prometheus.for_registry(prometheus_registry) if prometheus or prometheus_registry is not None else None
+        self.prices = MODEL_PRICES if prices is None else prices
+        self.cached_prices = CACHED_PROMPT_PRICES if cached_prices is None else cached_prices
+        self.records: deque[NodeRun] = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._owners: dict[UUID, NodeRun] = {}
+        self._nodes: dict[UUID, NodeRun] = {}
+        self._timers: dict[UUID, float] = {}
+        self._models: dict[UUID, str] = {}
+        # (thread_id, namespace) -> {step: time the last node of that step finished}
+        self._step_ends: OrderedDict[tuple, dict[int, float]] = OrderedDict()
+        self._max_namespaces = max_namespaces
+
+    # ---------------- Nodes ----------------
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        if not metadata or metadata.get("langgraph_node") != name:
+            self._adopt(run_id, parent_run_id)
+            return
+
+        analyst, turn = _interview_tags(inputs)
+        run = NodeRun(
+            node=name,
+            thread_id=metadata.get("thread_id"),
+            namespace=metadata.get("checkpoint_ns", ""),
+            step=metadata.get("langgraph_step", 0),
+            analyst=analyst,
+            turn=turn,
+            start=time.perf_counter(),
+        )
+        with self._lock:
+            parent = self._owners.get(parent_run_id)
+            if run.analyst is None and parent is not None:
+                run.analyst, run.turn = parent.analyst, parent.turn
+            ready = self._step_ends.get((run.thread_id, run.namespace), {}).get(run.step - 1)
+            if ready is not None:
+                run.queue_wait = max(0.0, run.start - ready)
+            self._owners[run_id] = self._nodes[run_id] = run
+        if self.tracer is not None:
+            self._start_span(run, parent)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        # Interrupts (confirm_analysts) and Command hand-offs surface as errors but are normal control flow
+        is_control_flow = type(error).__name__ in ("GraphInterrupt", "ParentCommand", "GraphBubbleUp")
+        self._end(run_id, None if is_control_flow else type(error).__name__)
+
+    def _adopt(self, run_id: UUID, parent_run_id: Optional[UUID]) -> None:
+        owner = self._owners.get(parent_run_id)
+        if owner is not None:
+            self._owners[run_id] = owner
+
+    def _end(self, run_id: UUID, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._owners.pop(run_id, None)
+            run = self._nodes.pop(run_id, None)
+            if run is None:
+                return
+            end = time.perf_counter()
+            run.duration = end - run.start
+            run.error = error
+            if run.node in SEARCH_NODES and run.search_time == 0.0:
+                run.search_time = run.duration
+            key = (run.thread_id, run.namespace)
+            steps = self._step_ends.setdefault(key, {})
+            steps[run.step] = max(end, steps.get(run.step, 0.0))
+            for step in [s for s in steps if s < run.step - 1]:
+                del steps[step]
+            self._step_ends.move_to_end(key)
+            while len(self._step_ends) > self._max_namespaces:
+                self._step_ends.popitem(last=False)
+            self.records.append(run)
+
+        if self.prometheus is not None:
+            self.prometheus.node_seconds.labels(run.node).observe(run.duration)
+            self.prometheus.queue_seconds.labels(run.node).observe(run.queue_wait)
+            if run.search_time:
+                self.prometheus.search_seconds.labels(run.node).observe(run.search_time)
+            if error:
+                self.prometheus.node_errors.labels(run.node).inc()
+        if run.span is not None:
+            self._end_span(run)
+
+    # ---------------- LLM calls ----------------
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._llm_start(run_id, parent_run_id, metadata, kwargs.get("invocation_params"))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._llm_start(run_id, parent_run_id, metadata, kwargs.get("invocation_params"))
+
+    def _llm_start(self, run_id, parent_run_id, metadata, invocation_params) -> None:
+        params = invocation_params or {}
+        model = (metadata or {}).get("ls_model_name") or params.get("model_name") or params.get("model") or "unknown"
+        with self._lock:
+            self._adopt(run_id, parent_run_id)
+            self._models[run_id] = model
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens = completion_tokens = cached_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+                cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0)
+        if not (prompt_tokens or completion_tokens):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+            cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+
+        with self._lock:
+            model = self._models.pop(run_id, "unknown")
+            run = self._owners.pop(run_id, None)
+            cost = estimate_cost(model, prompt_tokens, completion_tokens, self.prices, cached_tokens, self.cached_prices)
+            if run is not None:
+                run.llm_calls += 1
+                run.prompt_tokens += prompt_tokens
+                run.completion_tokens += completion_tokens
+                run.cached_tokens += cached_tokens
+                run.cost += cost
+
+        if self.prometheus is not None:
+            node = run.node if run is not None else ""
+            self.prometheus.llm_calls.labels(node, model).inc()
+            self.prometheus.llm_tokens.labels(node, model, "prompt").inc(prompt_tokens)
+            self.prometheus.llm_tokens.labels(node, model, "completion").inc(completion_tokens)
+            self.prometheus.llm_tokens.labels(node, model, "cached").inc(cached_tokens)
+            self.prometheus.llm_cost.labels(node, model).inc(cost)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._models.pop(run_id, None)
+            self._owners.pop(run_id, None)
+
+    # ---------------- Search ----------------
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._search_start(run_id, parent_run_id)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._search_start(run_id, parent_run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._search_end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._search_end(run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._search_end(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._search_end(run_id)
+
+    def _search_start(self, run_id: UUID, parent_run_id: Optional[UUID]) -> None:
+        with self._lock:
+            self._adopt(run_id, parent_run_id)
+            self._timers[run_id] = time.perf_counter()
+
+    def _search_end(self, run_id: UUID) -> None:
+        with self._lock:
+            start = self._timers.pop(run_id, None)
+            run = self._owners.pop(run_id, None)
+            if start is not None and run is not None:
+                run.search_time += time.perf_counter() - start
+
+    # ---------------- OpenTelemetry ----------------
+    def _start_span(self, run: NodeRun, parent: Optional[NodeRun]) -> None:
+        from opentelemetry import trace
+
+        context = trace.set_span_in_context(parent.span) if parent is not None and parent.span is not None else None
+        attributes = {f"dr_agent.{key}": value for key, value in run.tags().items()}
+        attributes["dr_agent.step"] = run.step
+        run.span = self.tracer.start_span(run.node, context=context, attributes=attributes)
+
+    def _end_span(self, run: NodeRun) -> None:
+        from opentelemetry.trace import Status, StatusCode
+
+        run.span.set_attributes({
+            "dr_agent.queue_wait_s": run.queue_wait,
+            "dr_agent.search_s": run.search_time,
+            "dr_agent.llm_calls": run.llm_calls,
+            "gen_ai.usage.input_tokens": run.prompt_tokens,
+            "gen_ai.usage.output_tokens": run.completion_tokens,
+            "dr_agent.cached_input_tokens": run.cached_tokens,
+            "dr_agent.cost_usd": run.cost,
+        })
+        if run.error:
+            run.span.set_status(Status(StatusCode.ERROR, run.error))
+        run.span.end()
+
+    # ---------------- Reporting ----------------
+    def summary(self) -> dict[str, dict[str, float]]:
+        """ Per-node totals over the recorded runs """
+        totals: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        with self._lock:
+            records = list(self.records)
+        for run in records:
+            node = totals[run.node]
+            node["calls"] += 1
+            node["errors"] += run.error is not None
+            node["total_s"] += run.duration
+            node["max_s"] = max(node["max_s"], run.duration)
+            node["queue_wait_s"] += run.queue_wait
+            node["search_s"] += run.search_time
+            node["llm_calls"] += run.llm_calls
+            node["prompt_tokens"] += run.prompt_tokens
+            node["completion_tokens"] += run.completion_tokens
+            node["cached_tokens"] += run.cached_tokens
+            node["cost_usd"] += run.cost
+        for node in totals.values():
+            node["mean_s"] = node["total_s"] / node["calls"]
+            node["cache_ratio"] = node["cached_tokens"] / node["prompt_tokens"] if node["prompt_tokens"] else 0.0
+        return {name: dict(values) for name, values in sorted(totals.items())}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+
+def _tracer(enabled: bool):
+    if not enabled:
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError as e:
+        raise ImportError(
+            "The opentelemetry exporter needs opentelemetry-api: pip install \"deep-research[telemetry]\""
+        ) from e
+    return trace.get_tracer("dr_agent")
+
+
+_handlers: dict[tuple[str, ...], NodeTelemetry] = {}
+_handlers_lock = threading.Lock()
+
+
+def get_telemetry(configuration: Configuration) -> Optional[NodeTelemetry]:
+    """ Return the process-wide handler for this configuration's exporters, or None when disabled """
+    if not configuration.telemetry_enabled:
+        return None
+    exporters = tuple(sorted(e.strip() for e in configuration.telemetry_exporters.split(",") if e.strip()))
+    unknown = set(exporters) - set(SUPPORTED_EXPORTERS)
+    if unknown:
+        raise ValueError(f"Unknown telemetry exporters {sorted(unknown)}, expected some of {SUPPORTED_EXPORTERS}")
+    with _handlers_lock:
+        handler = _handlers.get(exporters)
+        if handler is None:
+            handler = _handlers[exporters] = NodeTelemetry(
+                tracer=_tracer("opentelemetry" in exporters),
+                prometheus="prometheus" in exporters,
+            )
+        return handler
+
+
+def telemetry_from_config(config: Optional[RunnableConfig] = None) -> Optional[NodeTelemetry]:
+    """ `get_telemetry` for the telemetry_* fields of ``config`` """
+    return get_telemetry(Configuration.from_runnable_config(config))